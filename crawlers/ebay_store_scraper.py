@@ -15,7 +15,7 @@ Usage:
     # Test with 20 products
     python ebay_store_scraper.py --store argocityltd --max-products 20
 
-    # Resume from saved product URLs
+    # Resume from saved product URLs (items that errored last time are retried)
     python ebay_store_scraper.py --store argocityltd --resume
 
     # Skip compatibility (faster)
@@ -23,35 +23,78 @@ Usage:
 
     # Full compat extraction (click through ALL pagination pages - slow)
     python ebay_store_scraper.py --store argocityltd --full-compat
+
+    # Faster full compat: stop after 3 pages in a row add no new make/year.
+    # Tables are sorted by make, so this can miss later makes (truncated results)
+    python ebay_store_scraper.py --store argocityltd --full-compat --compat-stagnant-pages 3
+
+    # Scrape products in 8 parallel browser contexts (default 4)
+    python ebay_store_scraper.py --store argocityltd --workers 8
 """
 
 import argparse
 import csv
 import json
+import os
+import queue
 import re
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
+import requests
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
 from playwright.sync_api import sync_playwright
 from playwright_stealth import Stealth
 
+try:
+    import orjson
+except ImportError:  # Optional: falls back to the stdlib json module
+    orjson = None
+
 
 # =============================================================================
 # CONSTANTS
 # =============================================================================
 
 EBAY_BASE = "https://www.ebay.co.uk"
-ITEMS_PER_PAGE = 72
-DELAY_BETWEEN_PAGES = 3.0
-DELAY_BETWEEN_PRODUCTS = 3.0
+STORE_PAGE_SIZES = (240, 120, 72)  # eBay's max first; smaller sizes are fallbacks
+INITIAL_DELAY = 0.5   # Seconds between requests; adapts to challenge pages
+MIN_DELAY = 0.3
+MAX_DELAY = 10.0
+PRODUCT_WORKERS = 4
+WORKER_RELAUNCHES = 3  # Browser restarts a worker attempts before giving up on its share of the queue
+COMPAT_STAGNANT_PAGES = 0  # 0 = read every compat page; >0 trades completeness for speed
+COMPAT_WAIT_MS = 4000  # The compat table is injected after load; listings without one wait this long
+
+# Requests not needed for extraction (image URLs come from JSON-LD, never the bytes)
+BLOCKED_RESOURCE_TYPES = frozenset({"image", "media", "font", "stylesheet"})
+BLOCK_HOSTS = ("google-analytics", "doubleclick", "criteo", "scorecardresearch", "ebaystatic.com/img")
+
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
+GDPR_CONSENT_COOKIE = "gdpr-consent"
+HTTP_HEADERS = {"User-Agent": USER_AGENT, "Accept-Language": "en-GB,en;q=0.9"}
+
+# Store listing HTML: item links and bot-challenge markers
+_ITM_RE = re.compile(rb"/itm/(\d{9,15})")
+_TITLE_RE = re.compile(rb"<title[^>]*>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+_CHALLENGE_MARKERS = (b"security", b"pardon our interruption", b"captcha")
+# Playwright error text when the page, context or browser died under us
+_BROWSER_GONE_MARKERS = ("has been closed", "Target closed", "Browser closed", "browser has disconnected")
+
+# Precompiled patterns for slug generation
+_SLUG_STRIP_RE = re.compile(r'[^\w\s-]')
+_SLUG_DASH_RE = re.compile(r'[-\s]+')
 
 # JavaScript: extract product data from JSON-LD + page
 JS_EXTRACT_PRODUCT = """() => {
     const result = {
         title: '', price: '', currency: 'GBP', images: [],
         condition: '', brand: '', item_specifics: {}, description_html: '',
+        page_title: document.title,
     };
 
     // JSON-LD
@@ -107,9 +150,14 @@ JS_EXTRACT_PRODUCT = """() => {
     return result;
 }"""
 
-# JavaScript: extract compatibility table from current page view
-JS_EXTRACT_COMPAT = """() => {
-    const result = { exists: false, makes: [], years: [], totalPages: 0, hasTable: false };
+# JavaScript: extract compatibility table. With allPages=true, clicks through
+# every pagination page inside the browser and returns the combined rows,
+# stopping early once stagnantLimit pages in a row add no new makes/years.
+JS_EXTRACT_COMPAT = """async ({ allPages, stagnantLimit }) => {
+    const result = {
+        exists: false, makes: [], years: [], totalPages: 0, pagesScraped: 0,
+        hasTable: false, stoppedEarly: false, error: '',
+    };
 
     const wrapper = document.getElementById("d-motors-compatibility-table");
     if (!wrapper) return result;
@@ -122,75 +170,288 @@ JS_EXTRACT_COMPAT = """() => {
         result.totalPages = parseInt(lastBtn.textContent.trim()) || pagBtns.length;
     }
 
-    const table = wrapper.querySelector("table");
-    if (!table) return result;
-    result.hasTable = true;
+    // Parse the rows currently rendered; returns the number of makes found
+    const scrapeRows = () => {
+        const table = wrapper.querySelector("table");
+        if (!table) return -1;
+
+        // Get header indices
+        const headers = [];
+        table.querySelectorAll("thead th, thead td").forEach(th => headers.push(th.textContent.trim().toLowerCase()));
+        const makeIdx = headers.indexOf("make");
+        const yearIdx = headers.indexOf("year");
+
+        let found = 0;
+        const tbody = table.querySelector("tbody") || table;
+        tbody.querySelectorAll("tr").forEach(tr => {
+            const cells = tr.querySelectorAll("td");
+            if (makeIdx >= 0 && makeIdx < cells.length) {
+                const t = cells[makeIdx].textContent.trim();
+                if (t && t.toLowerCase() !== "make") { result.makes.push(t); found++; }
+            }
+            if (yearIdx >= 0 && yearIdx < cells.length) {
+                const t = cells[yearIdx].textContent.trim();
+                if (t && t.toLowerCase() !== "year") {
+                    // Expand ranges like "2009-2015" into individual years
+                    const m = t.match(/^(\\d{4})\\s*[-\\u2013]\\s*(\\d{4})/);
+                    if (m) {
+                        for (let y = +m[1]; y <= +m[2]; y++) result.years.push(String(y));
+                    } else if (/^\\d{4}/.test(t)) {
+                        result.years.push(t.slice(0, 4));
+                    } else {
+                        result.years.push(t);
+                    }
+                }
+            }
+        });
+        return found;
+    };
 
-    // Get header indices
-    const headers = [];
-    table.querySelectorAll("thead th, thead td").forEach(th => headers.push(th.textContent.trim().toLowerCase()));
-    const makeIdx = headers.indexOf("make");
-    const yearIdx = headers.indexOf("year");
-
-    // Parse rows
-    const tbody = table.querySelector("tbody") || table;
-    tbody.querySelectorAll("tr").forEach(tr => {
-        const cells = tr.querySelectorAll("td");
-        if (makeIdx >= 0 && makeIdx < cells.length) {
-            const t = cells[makeIdx].textContent.trim();
-            if (t && t.toLowerCase() !== "make") result.makes.push(t);
-        }
-        if (yearIdx >= 0 && yearIdx < cells.length) {
-            const t = cells[yearIdx].textContent.trim();
-            if (t && t.toLowerCase() !== "year") result.years.push(t);
-        }
+    // Resolve true once the table has changed and gone quiet, false on timeout
+    const waitForTableUpdate = (timeout) => new Promise(resolve => {
+        let settle = null;
+        const observer = new MutationObserver(() => {
+            clearTimeout(settle);
+            settle = setTimeout(() => { observer.disconnect(); clearTimeout(deadline); resolve(true); }, 150);
+        });
+        const deadline = setTimeout(() => { observer.disconnect(); clearTimeout(settle); resolve(false); }, timeout);
+        observer.observe(wrapper, { childList: true, subtree: true, characterData: true });
     });
 
+    // Fold rows scraped since the last call into the unique sets; true if any were new
+    const uniqueMakes = new Set(), uniqueYears = new Set();
+    let seenMakes = 0, seenYears = 0;
+    const trackNew = () => {
+        const before = uniqueMakes.size + uniqueYears.size;
+        for (; seenMakes < result.makes.length; seenMakes++) uniqueMakes.add(result.makes[seenMakes]);
+        for (; seenYears < result.years.length; seenYears++) uniqueYears.add(result.years[seenYears]);
+        return uniqueMakes.size + uniqueYears.size > before;
+    };
+
+    if (scrapeRows() < 0) return result;
+    result.hasTable = true;
+    result.pagesScraped = 1;
+    if (!allPages) return result;
+    trackNew();
+
+    let stagnant = 0;
+    try {
+        for (let pg = 2; pg <= result.totalPages; pg++) {
+            const btn = [...wrapper.querySelectorAll("button.pagination__item")]
+                .find(b => b.textContent.trim() === String(pg));
+            if (!btn) break;
+
+            const updated = waitForTableUpdate(2000);
+            btn.click();
+            if (!(await updated)) break;
+
+            if (scrapeRows() <= 0) break;
+            result.pagesScraped = pg;
+
+            stagnant = trackNew() ? 0 : stagnant + 1;
+            if (stagnantLimit > 0 && stagnant >= stagnantLimit && pg < result.totalPages) {
+                result.stoppedEarly = true;
+                break;
+            }
+        }
+    } catch (e) {
+        result.error = String(e);
+    }
+
     return result;
 }"""
 
+# JavaScript: product data and (optionally) compat rows in a single evaluate.
+# Pass null to skip compat, or the JS_EXTRACT_COMPAT argument object.
+JS_EXTRACT_PAGE = f"""async (compatArgs) => {{
+    const product = ({JS_EXTRACT_PRODUCT})();
+    product.compat = compatArgs ? await ({JS_EXTRACT_COMPAT})(compatArgs) : null;
+    return product;
+}}"""
+
+
+# =============================================================================
+# RATE LIMITING
+# =============================================================================
+
+
+class AdaptiveDelay:
+    """Delay between requests that doubles on challenge pages and decays on success.
+
+    Shared by all workers, since eBay rate-limits per client rather than per
+    browser context. Updates are single float assignments, so no lock.
+    """
+
+    def __init__(self, initial=INITIAL_DELAY, minimum=MIN_DELAY, maximum=MAX_DELAY):
+        self.delay = initial
+        self.minimum = minimum
+        self.maximum = maximum
+
+    def wait(self):
+        time.sleep(self.delay)
+
+    def ok(self):
+        self.delay = max(self.minimum, self.delay * 0.9)
+
+    def bad(self):
+        self.delay = min(self.maximum, self.delay * 2)
+        print(f"  Backing off: delay now {self.delay:.1f}s", flush=True)
+
+
+# =============================================================================
+# BROWSER SESSION
+# =============================================================================
+
+
+def _block_heavy_requests(route):
+    """Abort images, fonts, CSS and tracker requests; let everything else through."""
+    request = route.request
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or any(h in request.url for h in BLOCK_HOSTS):
+        route.abort()
+    else:
+        route.continue_()
+
+
+def launch_context(p, profile_dir, headed=False):
+    """Launch a persistent Chromium context with stealth applied.
+
+    Cookies and storage live in profile_dir, so the eBay session and cookie
+    consent carry over between runs. A profile can only be open in one
+    browser at a time, so each worker needs its own directory.
+    """
+    context = p.chromium.launch_persistent_context(
+        user_data_dir=str(profile_dir),
+        headless=not headed,
+        args=["--disable-blink-features=AutomationControlled", "--no-sandbox"],
+        user_agent=USER_AGENT,
+        viewport={"width": 1920, "height": 1080},
+        locale="en-GB",
+    )
+    Stealth().apply_stealth_sync(context)
+    context.route("**/*", _block_heavy_requests)
+    return context
+
+
+def warm_up_session(page):
+    """Establish an eBay session and accept the cookie banner.
+
+    Skipped when the persistent profile already holds the consent cookie.
+    """
+    if any(c["name"] == GDPR_CONSENT_COOKIE for c in page.context.cookies(EBAY_BASE)):
+        print("Reusing saved eBay session", flush=True)
+        return
+
+    page.goto(EBAY_BASE, wait_until="domcontentloaded", timeout=30000)
+    try:
+        btn = page.locator("#gdpr-banner-accept")
+        btn.wait_for(state="visible", timeout=5000)
+        btn.click()
+        print("Accepted cookies", flush=True)
+        btn.wait_for(state="hidden", timeout=5000)
+    except Exception:
+        pass
+
 
 # =============================================================================
 # PHASE 1: COLLECT PRODUCT URLs FROM STORE
 # =============================================================================
 
 
-def collect_product_urls(page, store_name):
-    """Navigate through the eBay store pages and collect all item IDs."""
-    all_item_ids = set()
+def _is_challenge_page(html):
+    """Check whether raw HTML is an eBay security/CAPTCHA interstitial."""
+    match = _TITLE_RE.search(html)
+    title = match.group(1).lower() if match else b""
+    return any(marker in title for marker in _CHALLENGE_MARKERS) or b"/splashui/challenge" in html
+
+
+def _paginate_store(store_name, fetch_item_ids, delay):
+    """Walk the store listing pages and return item IDs in listing order.
+
+    fetch_item_ids(url) returns the item IDs on one page, or None to abort
+    (the whole walk then returns None). An empty page is retried at the next
+    smaller page size, from the same listing offset, before it is treated as
+    the end of the store.
+    """
+    all_item_ids = {}  # dict as an insertion-ordered set
+    page_sizes = list(STORE_PAGE_SIZES)
+    page_size = page_sizes.pop(0)
     page_num = 1
 
     while True:
-        url = f"{EBAY_BASE}/str/{store_name}?_pgn={page_num}&_ipg={ITEMS_PER_PAGE}"
+        url = f"{EBAY_BASE}/str/{store_name}?_pgn={page_num}&_ipg={page_size}"
         print(f"  [Page {page_num}] {url}", flush=True)
 
-        page.goto(url, wait_until="load", timeout=30000)
-        page.wait_for_timeout(3000)
-
-        item_ids = page.evaluate("""() => {
-            const ids = new Set();
-            document.querySelectorAll('a[href]').forEach(a => {
-                const m = a.href.match(/\\/itm\\/(\\d{9,15})/);
-                if (m) ids.add(m[1]);
-            });
-            return [...ids];
-        }""")
+        item_ids = fetch_item_ids(url)
+        if item_ids is None:
+            return None
 
         if not item_ids:
+            if page_sizes:
+                offset = (page_num - 1) * page_size
+                page_size = page_sizes.pop(0)
+                page_num = offset // page_size + 1
+                print(f"  No items - retrying with {page_size} items per page", flush=True)
+                delay.wait()
+                continue
             print(f"  [Page {page_num}] No items - end of store", flush=True)
             break
 
-        new_ids = set(item_ids) - all_item_ids
-        all_item_ids.update(item_ids)
-        print(f"  [Page {page_num}] {len(item_ids)} items ({len(new_ids)} new, {len(all_item_ids)} total)", flush=True)
+        before = len(all_item_ids)
+        all_item_ids.update(dict.fromkeys(item_ids))
+        new_count = len(all_item_ids) - before
+        print(f"  [Page {page_num}] {len(item_ids)} items ({new_count} new, {len(all_item_ids)} total)", flush=True)
 
-        if len(new_ids) == 0:
+        if new_count == 0:
             break
 
         page_num += 1
-        time.sleep(DELAY_BETWEEN_PAGES)
+        delay.ok()
+        delay.wait()
+
+    return list(all_item_ids)
+
 
-    return sorted(all_item_ids)
+def collect_product_urls_fast(store_name, session, delay):
+    """Collect item IDs over plain HTTP, without a browser.
+
+    Store listings render their item links server-side, so a GET plus a
+    regex is enough. Returns None if eBay answers with a challenge page
+    so the caller can fall back to collect_product_urls().
+    """
+    def fetch_item_ids(url):
+        try:
+            resp = session.get(url, headers=HTTP_HEADERS, timeout=15)
+        except requests.RequestException as e:
+            print(f"  HTTP error: {e} - falling back to browser", flush=True)
+            return None
+        if resp.status_code != 200 or _is_challenge_page(resp.content):
+            delay.bad()
+            print(f"  Challenge page (HTTP {resp.status_code}) - falling back to browser", flush=True)
+            return None
+        return list(dict.fromkeys(m.decode() for m in _ITM_RE.findall(resp.content)))
+
+    return _paginate_store(store_name, fetch_item_ids, delay)
+
+
+def collect_product_urls(page, store_name, delay):
+    """Navigate through the eBay store pages in a browser and collect all item IDs."""
+    def fetch_item_ids(url):
+        page.goto(url, wait_until="domcontentloaded", timeout=30000)
+        try:
+            page.wait_for_selector("a[href*='/itm/']", state="attached", timeout=10000)
+        except PlaywrightTimeoutError:
+            pass  # No item links - the evaluate below returns an empty list
+
+        return page.evaluate("""() => {
+            const ids = new Set();
+            document.querySelectorAll('a[href]').forEach(a => {
+                const m = a.href.match(/\\/itm\\/(\\d{9,15})/);
+                if (m) ids.add(m[1]);
+            });
+            return [...ids];
+        }""")
+
+    return _paginate_store(store_name, fetch_item_ids, delay)
 
 
 # =============================================================================
@@ -198,35 +459,51 @@ def collect_product_urls(page, store_name):
 # =============================================================================
 
 
-def _expand_year(year_text):
-    """Expand year ranges like '2009-2015' into individual years."""
-    year_text = year_text.strip()
-    match = re.match(r"(\d{4})\s*[-\u2013]\s*(\d{4})", year_text)
-    if match:
-        return [str(yr) for yr in range(int(match.group(1)), int(match.group(2)) + 1)]
-    elif re.match(r"\d{4}", year_text):
-        return [year_text[:4]]
-    return [year_text] if year_text else []
+def wait_for_listing(page, with_compat=False):
+    """Wait for a product page's ld+json/h1 and, optionally, its late-injected compat table.
 
+    Timeouts are tolerated: extraction falls back to whatever has rendered.
+    """
+    try:
+        page.wait_for_selector("script[type='application/ld+json'], h1", state="attached", timeout=8000)
+    except PlaywrightTimeoutError:
+        pass  # Fall through to the security check / fallback extraction
+    if with_compat:
+        try:
+            page.wait_for_selector("#d-motors-compatibility-table", state="attached", timeout=COMPAT_WAIT_MS)
+        except PlaywrightTimeoutError:
+            pass  # Not every listing has a compatibility table
 
-def scrape_product(page, item_id, skip_compat=False, full_compat=False):
+
+def scrape_product(page, item_id, skip_compat=False, full_compat=False, stagnant_pages=COMPAT_STAGNANT_PAGES):
     """Scrape a single eBay product page."""
     url = f"{EBAY_BASE}/itm/{item_id}"
 
     try:
-        page.goto(url, wait_until="load", timeout=30000)
-        page.wait_for_timeout(4000)
+        page.goto(url, wait_until="domcontentloaded", timeout=30000)
     except Exception as e:
         return {"error": str(e), "item_id": item_id, "url": url}
 
-    # Check for security/captcha page
-    if "security" in page.title().lower():
-        page.wait_for_timeout(5000)
-        if "security" in page.title().lower():
-            return {"error": "Security/CAPTCHA page", "item_id": item_id, "url": url}
+    # Extract product data, page title and compat rows in one round-trip
+    compat_args = None if skip_compat else {"allPages": full_compat, "stagnantLimit": stagnant_pages}
+    wait_for_listing(page, compat_args is not None)
+    product_data = page.evaluate(JS_EXTRACT_PAGE, compat_args)
 
-    # Extract product data
-    product_data = page.evaluate(JS_EXTRACT_PRODUCT)
+    # Check for security/captcha page; give it a chance to redirect on its own
+    if "security" in product_data["page_title"].lower():
+        try:
+            page.wait_for_function("() => !document.title.toLowerCase().includes('security')", timeout=5000)
+        except PlaywrightTimeoutError:
+            return {"error": "Security/CAPTCHA page", "item_id": item_id, "url": url}
+        # The listing loads after the redirect; wait for it like a fresh navigation
+        try:
+            page.wait_for_load_state("domcontentloaded", timeout=10000)
+        except PlaywrightTimeoutError:
+            pass
+        wait_for_listing(page, compat_args is not None)
+        product_data = page.evaluate(JS_EXTRACT_PAGE, compat_args)
+    del product_data["page_title"]
+    compat = product_data.pop("compat")
 
     product = {
         "item_id": item_id,
@@ -238,162 +515,215 @@ def scrape_product(page, item_id, skip_compat=False, full_compat=False):
     }
 
     # Compatibility
-    if not skip_compat:
-        makes, years = extract_compatibility(page, full_compat)
-        product["compatibility_makes"] = sorted(set(makes))
-        product["compatibility_years"] = sorted(set(years))
+    if compat is not None:
+        makes, years = extract_compatibility(compat, full_compat, stagnant_pages)
+        product["compatibility_makes"] = sorted(makes)
+        product["compatibility_years"] = sorted(years)
 
     return product
 
 
-def extract_compatibility(page, full_compat=False):
-    """Extract compatibility makes/years from current product page."""
-    all_makes = []
-    all_years = []
+def _browser_gone(error):
+    """True if a scrape error means the browser/context died, not that the product failed."""
+    return any(marker in error for marker in _BROWSER_GONE_MARKERS)
 
-    # Extract first page of compat data
-    compat = page.evaluate(JS_EXTRACT_COMPAT)
 
-    if not compat["exists"] or not compat["hasTable"]:
-        return all_makes, all_years
+def _close_quietly(context):
+    try:
+        context.close()
+    except Exception:
+        pass  # Already closed or crashed
 
-    total_pages = compat["totalPages"]
-    print(f"    Compat: {total_pages} pages, {len(compat['makes'])} rows on page 1", flush=True)
-
-    # Process page 1
-    all_makes.extend(compat["makes"])
-    for yr in compat["years"]:
-        all_years.extend(_expand_year(yr))
-
-    # For full compat: click through remaining pages
-    if full_compat and total_pages > 1:
-        for pg in range(2, total_pages + 1):
-            try:
-                # Click the page button
-                btn = page.locator(f"#d-motors-compatibility-table button.pagination__item:text-is('{pg}')")
-                if btn.is_visible(timeout=2000):
-                    btn.click()
-                    page.wait_for_timeout(1500)
-
-                    page_compat = page.evaluate(JS_EXTRACT_COMPAT)
-                    if not page_compat["makes"]:
-                        break
 
-                    all_makes.extend(page_compat["makes"])
-                    for yr in page_compat["years"]:
-                        all_years.extend(_expand_year(yr))
+def scrape_worker(item_queue, on_result, profile_dir, delay, stop, skip_compat=False, full_compat=False,
+                  stagnant_pages=COMPAT_STAGNANT_PAGES, headed=False):
+    """Drain (position, item_id) pairs from item_queue in a dedicated browser until stop is set.
 
-                    if pg % 20 == 0:
-                        print(f"    Compat page {pg}/{total_pages} - {len(set(all_makes))} makes, {len(set(all_years))} years", flush=True)
-                else:
+    The Playwright sync API is not thread-safe, so every worker thread owns
+    its own Playwright instance, browser profile and cookie jar. If the
+    browser dies, the item goes back on the queue and the browser is
+    relaunched (up to WORKER_RELAUNCHES times); only genuine per-product
+    failures are reported through on_result.
+    """
+    with sync_playwright() as p:
+        context = launch_context(p, profile_dir, headed)
+        relaunches = 0
+        try:
+            pg = context.pages[0] if context.pages else context.new_page()
+            warm_up_session(pg)
+
+            while not stop.is_set():
+                try:
+                    position, item_id = item_queue.get_nowait()
+                except queue.Empty:
                     break
-            except Exception as e:
-                print(f"    Compat page {pg} error: {e}", flush=True)
-                break
-    elif total_pages > 1:
+                try:
+                    product = scrape_product(pg, item_id, skip_compat=skip_compat, full_compat=full_compat,
+                                             stagnant_pages=stagnant_pages)
+                except Exception as e:
+                    # One bad page (unexpected DOM, failed evaluate) must not end the worker
+                    product = {"error": str(e), "item_id": item_id, "url": f"{EBAY_BASE}/itm/{item_id}"}
+
+                if _browser_gone(product.get("error", "")):
+                    # Not this product's fault: requeue it and restart the browser
+                    item_queue.put((position, item_id))
+                    if stop.is_set() or relaunches >= WORKER_RELAUNCHES:
+                        print(f"  Worker {profile_dir.name}: browser closed, stopping", flush=True)
+                        break
+                    relaunches += 1
+                    print(f"  Worker {profile_dir.name}: browser closed, relaunching ({relaunches}/{WORKER_RELAUNCHES})", flush=True)
+                    _close_quietly(context)
+                    context = launch_context(p, profile_dir, headed)
+                    pg = context.pages[0] if context.pages else context.new_page()
+                    warm_up_session(pg)
+                    continue
+
+                on_result(position, product)
+
+                if "security" in product.get("error", "").lower():
+                    delay.bad()
+                else:
+                    delay.ok()
+                delay.wait()
+        finally:
+            _close_quietly(context)
+
+
+def extract_compatibility(compat, full_compat=False, stagnant_pages=COMPAT_STAGNANT_PAGES):
+    """Extract unique compatibility makes/years from a JS_EXTRACT_COMPAT result.
+
+    With full_compat, pagination stops early once stagnant_pages consecutive
+    pages add no new make or year (0 = never stop early). Returns two
+    insertion-ordered dicts used as sets (makes, years).
+    """
+    if not compat["exists"] or not compat["hasTable"]:
+        return {}, {}
+
+    total_pages = compat["totalPages"]
+    scraped_pages = compat["pagesScraped"]
+    print(f"    Compat: {total_pages} pages, {len(compat['makes'])} rows from {scraped_pages} page(s)", flush=True)
+
+    # Years arrive already expanded from JS
+    all_makes = dict.fromkeys(compat["makes"])
+    all_years = dict.fromkeys(compat["years"])
+
+    if compat["error"]:
+        print(f"    Compat page {scraped_pages + 1} error: {compat['error']}", flush=True)
+    if compat["stoppedEarly"]:
+        print(f"    Compat stopped at page {scraped_pages}/{total_pages} - no new makes/years for {stagnant_pages} pages", flush=True)
+    elif full_compat and scraped_pages < total_pages:
+        print(f"    Compat stopped at page {scraped_pages}/{total_pages}", flush=True)
+    elif not full_compat and total_pages > 1:
         print(f"    (Sampled page 1 only — use --full-compat for all {total_pages} pages)", flush=True)
 
-    um = len(set(all_makes))
-    uy = len(set(all_years))
-    print(f"    Compat result: {um} unique makes, {uy} unique years", flush=True)
+    print(f"    Compat result: {len(all_makes)} unique makes, {len(all_years)} unique years", flush=True)
     return all_makes, all_years
 
 
 # =============================================================================
-# PHASE 4: GENERATE SHOPIFY CSV
+# PHASE 4: SHOPIFY CSV ROWS
 # =============================================================================
 
 
 def slugify(text):
     """Convert text to URL-friendly slug."""
     text = text.lower().strip()
-    text = re.sub(r'[^\w\s-]', '', text)
-    text = re.sub(r'[-\s]+', '-', text)
+    text = _SLUG_STRIP_RE.sub('', text)
+    text = _SLUG_DASH_RE.sub('-', text)
     return text.strip('-')[:200]
 
 
-def generate_shopify_csv(products, output_path):
-    """Generate a Shopify-ready product import CSV."""
-    fieldnames = [
-        "Handle", "Title", "Body (HTML)", "Vendor", "Type", "Tags", "Published",
-        "Option1 Name", "Option1 Value", "Option2 Name", "Option2 Value",
-        "Option3 Name", "Option3 Value",
-        "Variant SKU", "Variant Grams", "Variant Inventory Tracker",
-        "Variant Inventory Qty", "Variant Inventory Policy",
-        "Variant Fulfillment Service", "Variant Price", "Variant Compare At Price",
-        "Variant Requires Shipping", "Variant Taxable", "Variant Barcode",
-        "Image Src", "Image Position", "Image Alt Text",
-        "Gift Card", "SEO Title", "SEO Description",
-        "Variant Image", "Variant Weight Unit", "Cost per item", "Status",
-        "Metafield: custom.car_make [list.single_line_text_field]",
-        "Metafield: custom.car_year [list.single_line_text_field]",
-    ]
-
-    total_rows = 0
-    valid = 0
-
-    with open(output_path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction="ignore")
-        writer.writeheader()
-
-        for product in products:
-            if product.get("error"):
+# Column order for the Shopify import CSV; rows are written as tuples in this order
+SHOPIFY_FIELDS = (
+    "Handle", "Title", "Body (HTML)", "Vendor", "Type", "Tags", "Published",
+    "Option1 Name", "Option1 Value", "Option2 Name", "Option2 Value",
+    "Option3 Name", "Option3 Value",
+    "Variant SKU", "Variant Grams", "Variant Inventory Tracker",
+    "Variant Inventory Qty", "Variant Inventory Policy",
+    "Variant Fulfillment Service", "Variant Price", "Variant Compare At Price",
+    "Variant Requires Shipping", "Variant Taxable", "Variant Barcode",
+    "Image Src", "Image Position", "Image Alt Text",
+    "Gift Card", "SEO Title", "SEO Description",
+    "Variant Image", "Variant Weight Unit", "Cost per item", "Status",
+    "Metafield: custom.car_make [list.single_line_text_field]",
+    "Metafield: custom.car_year [list.single_line_text_field]",
+)
+
+# Item specifics copied into Tags, in output order
+TAG_FIELDS = ("Brand", "Technology", "Lighting Technology", "Bulb Type",
+              "Light Colour", "Placement on Vehicle", "Voltage")
+
+# Padding around the image columns for the extra image rows
+_BLANKS_BEFORE_IMAGE = ("",) * (SHOPIFY_FIELDS.index("Image Src") - 1)
+_BLANKS_AFTER_IMAGE = ("",) * (len(SHOPIFY_FIELDS) - SHOPIFY_FIELDS.index("Image Alt Text") - 1)
+
+
+def write_shopify_rows(writer, product):
+    """Write one product's Shopify import rows; returns the number of rows written."""
+    item_id = product.get("item_id", "")
+    title = product.get("title", "")
+    handle = slugify(title) if title else f"item-{item_id}"
+    handle = f"{handle}-{item_id[-4:]}" if item_id else handle
+
+    specs = product.get("item_specifics", {})
+    product_type = specs.get("Type", "") or specs.get("Bulb Type", "")
+    tags_str = ", ".join(v for f in TAG_FIELDS if (v := specs.get(f)))
+
+    compat_makes = product.get("compatibility_makes", [])
+    compat_years = product.get("compatibility_years", [])
+    images = product.get("images", [])
+
+    makes_str = ", ".join(compat_makes)
+    years_str = ", ".join(compat_years)
+    image_src = images[0] if images else ""
+    image_pos = "1" if images else ""
+
+    writer.writerow((
+        handle, title, product.get("description_html", ""), "Argo City Ltd",
+        product_type, tags_str, "TRUE",
+        "Title", "Default Title", "", "", "", "",
+        item_id, "0", "", "", "deny", "manual", product.get("price", ""), "",
+        "TRUE", "TRUE", "",
+        image_src, image_pos, title,
+        "", "", "", "", "", "", "active",
+        makes_str, years_str,
+    ))
+    rows = 1
+
+    # Extra image rows: only Handle and the image columns are populated
+    for idx, img_url in enumerate(images[1:], start=2):
+        writer.writerow((handle,) + _BLANKS_BEFORE_IMAGE + (img_url, str(idx), title) + _BLANKS_AFTER_IMAGE)
+        rows += 1
+
+    return rows
+
+
+def json_line(obj):
+    """Serialize obj as a single JSONL line (bytes), using orjson when installed."""
+    if orjson is not None:
+        return orjson.dumps(obj) + b"\n"
+    return (json.dumps(obj) + "\n").encode("utf-8")
+
+
+def json_loads(data):
+    """Parse JSON from str or bytes, using orjson when installed."""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def export_products_json(progress_file, json_output):
+    """Stream the JSONL progress log into a JSON array of successful products."""
+    count = 0
+    with open(progress_file, "rb") as src, open(json_output, "wb") as dst:
+        dst.write(b"[")
+        for line in src:
+            line = line.strip()
+            if not line or json_loads(line).get("error"):
                 continue
-            valid += 1
-
-            item_id = product.get("item_id", "")
-            title = product.get("title", "")
-            handle = slugify(title) if title else f"item-{item_id}"
-            handle = f"{handle}-{item_id[-4:]}" if item_id else handle
-
-            specs = product.get("item_specifics", {})
-            product_type = specs.get("Type", "") or specs.get("Bulb Type", "")
-            tag_fields = ["Brand", "Technology", "Lighting Technology", "Bulb Type",
-                          "Light Colour", "Placement on Vehicle", "Voltage"]
-            tags = [specs[f] for f in tag_fields if specs.get(f)]
-
-            compat_makes = product.get("compatibility_makes", [])
-            compat_years = product.get("compatibility_years", [])
-            images = product.get("images", [])
-
-            row = {
-                "Handle": handle,
-                "Title": title,
-                "Body (HTML)": product.get("description_html", ""),
-                "Vendor": "Argo City Ltd",
-                "Type": product_type,
-                "Tags": ", ".join(tags),
-                "Published": "TRUE",
-                "Option1 Name": "Title",
-                "Option1 Value": "Default Title",
-                "Variant SKU": item_id,
-                "Variant Grams": "0",
-                "Variant Inventory Policy": "deny",
-                "Variant Fulfillment Service": "manual",
-                "Variant Price": product.get("price", ""),
-                "Variant Requires Shipping": "TRUE",
-                "Variant Taxable": "TRUE",
-                "Image Src": images[0] if images else "",
-                "Image Position": "1" if images else "",
-                "Image Alt Text": title,
-                "Status": "active",
-                "Metafield: custom.car_make [list.single_line_text_field]": ", ".join(compat_makes),
-                "Metafield: custom.car_year [list.single_line_text_field]": ", ".join(compat_years),
-            }
-            writer.writerow(row)
-            total_rows += 1
-
-            for idx, img_url in enumerate(images[1:], start=2):
-                writer.writerow({
-                    "Handle": handle,
-                    "Image Src": img_url,
-                    "Image Position": str(idx),
-                    "Image Alt Text": title,
-                })
-                total_rows += 1
-
-    print(f"\nShopify CSV: {output_path}", flush=True)
-    print(f"Products: {valid} | CSV rows: {total_rows}", flush=True)
+            dst.write(b",\n" if count else b"\n")
+            dst.write(line)
+            count += 1
+        dst.write(b"\n]\n")
+    return count
 
 
 # =============================================================================
@@ -408,7 +738,14 @@ def main():
     parser.add_argument("--resume", "-r", action="store_true", help="Resume from saved item IDs")
     parser.add_argument("--skip-compat", action="store_true", help="Skip compatibility extraction")
     parser.add_argument("--full-compat", action="store_true", help="Click through ALL compat pages (slow)")
+    parser.add_argument("--compat-stagnant-pages", type=int, default=COMPAT_STAGNANT_PAGES,
+                        help="With --full-compat, stop after this many pages add no new makes/years. "
+                             "Faster, but may truncate results since tables are sorted by make "
+                             f"(default: {COMPAT_STAGNANT_PAGES} = read every page)")
     parser.add_argument("--headed", action="store_true", help="Show browser window")
+    parser.add_argument("--workers", "-w", type=int, default=PRODUCT_WORKERS,
+                        help=f"Parallel browser contexts for product scraping (default: {PRODUCT_WORKERS})")
+    parser.add_argument("--json", action="store_true", help="Also export products as a JSON array")
     args = parser.parse_args()
 
     script_dir = Path(__file__).parent
@@ -419,122 +756,153 @@ def main():
     timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
     csv_output = output_dir / f"shopify-product-import-{timestamp}.csv"
     json_output = output_dir / f"products-{timestamp}.json"
-    progress_file = output_dir / "scrape-progress.json"
+    progress_file = output_dir / "scrape-progress.jsonl"
+    # Browser profiles hold eBay session cookies: keep them in the user cache, out of the repo
+    cache_home = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+    profile_root = cache_home / "ebay-store-scraper" / args.store
 
     print("=" * 60, flush=True)
     print("eBay Store → Shopify Product Import", flush=True)
     print("=" * 60, flush=True)
     print(f"Store:       {args.store}", flush=True)
     print(f"Output:      {output_dir}", flush=True)
+    print(f"Profiles:    {profile_root}", flush=True)
     if args.max_products: print(f"Max items:   {args.max_products}", flush=True)
     if args.skip_compat: print(f"Compat:      SKIPPED", flush=True)
     if args.full_compat: print(f"Compat:      FULL (all pages)", flush=True)
+    print(f"Workers:     {args.workers}", flush=True)
     print("=" * 60, flush=True)
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(
-            headless=not args.headed,
-            args=["--disable-blink-features=AutomationControlled", "--no-sandbox"],
-        )
-        context = browser.new_context(
-            user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36",
-            viewport={"width": 1920, "height": 1080},
-            locale="en-GB",
-        )
-        Stealth().apply_stealth_sync(context)
-        pg = context.new_page()
-
-        # Warmup: establish eBay session
-        print("\nWarming up session...", flush=True)
-        pg.goto(EBAY_BASE, wait_until="load", timeout=30000)
-        pg.wait_for_timeout(3000)
-        try:
-            btn = pg.locator("#gdpr-banner-accept")
-            if btn.is_visible(timeout=3000):
-                btn.click()
-                print("Accepted cookies", flush=True)
-                pg.wait_for_timeout(2000)
-        except Exception:
-            pass
-
-        # PHASE 1: Collect item IDs
-        if args.resume and ids_file.exists():
-            with open(ids_file) as f:
-                item_ids = [line.strip() for line in f if line.strip()]
-            print(f"\nResumed {len(item_ids)} item IDs from {ids_file}", flush=True)
-        else:
-            print("\n--- Phase 1: Collecting product URLs ---", flush=True)
-            item_ids = collect_product_urls(pg, args.store)
-            with open(ids_file, "w") as f:
-                for iid in item_ids:
-                    f.write(iid + "\n")
-            print(f"Saved {len(item_ids)} item IDs", flush=True)
-
-        if args.max_products > 0:
-            item_ids = item_ids[:args.max_products]
-        print(f"\nProducts to scrape: {len(item_ids)}", flush=True)
-
-        # PHASE 2-3: Scrape each product
-        print("\n--- Phase 2-3: Scraping products ---", flush=True)
-        products = []
-        errors = []
-        scraped_ids = set()
+    delay = AdaptiveDelay()
+
+    # PHASE 1: Collect item IDs
+    if args.resume and ids_file.exists():
+        with open(ids_file) as f:
+            item_ids = [line.strip() for line in f if line.strip()]
+        print(f"\nResumed {len(item_ids)} item IDs from {ids_file}", flush=True)
+    else:
+        print("\n--- Phase 1: Collecting product URLs ---", flush=True)
+        with requests.Session() as session:
+            item_ids = collect_product_urls_fast(args.store, session, delay)
+
+        if item_ids is None:
+            with sync_playwright() as p:
+                context = launch_context(p, profile_root / "worker-1", args.headed)
+                pg = context.pages[0] if context.pages else context.new_page()
+
+                print("\nWarming up session...", flush=True)
+                warm_up_session(pg)
+
+                print("\n--- Phase 1: Collecting product URLs (browser) ---", flush=True)
+                item_ids = collect_product_urls(pg, args.store, delay)
+                context.close()
+
+        with open(ids_file, "w") as f:
+            for iid in item_ids:
+                f.write(iid + "\n")
+        print(f"Saved {len(item_ids)} item IDs", flush=True)
+
+    if args.max_products > 0:
+        item_ids = item_ids[:args.max_products]
+    print(f"\nProducts to scrape: {len(item_ids)}", flush=True)
+
+    # PHASE 2-4: Scrape products, streaming each one to the progress log and CSV
+    print("\n--- Phase 2-4: Scraping products → Shopify CSV ---", flush=True)
+    errors = []
+    scraped_ids = set()
+    stats = {"products": 0, "with_compat": 0, "rows": 0}
+
+    with open(csv_output, "w", newline="", encoding="utf-8") as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(SHOPIFY_FIELDS)
+
+        def add_product(product):
+            stats["products"] += 1
+            if product.get("compatibility_makes"):
+                stats["with_compat"] += 1
+            stats["rows"] += write_shopify_rows(writer, product)
 
         if args.resume and progress_file.exists():
-            with open(progress_file) as f:
-                progress = json.load(f)
-                products = progress.get("products", [])
-                errors = progress.get("errors", [])
-                scraped_ids = {p.get("item_id") for p in products} | {e.get("item_id") for e in errors}
-                print(f"Resuming: {len(products)} done, {len(errors)} errors", flush=True)
-
+            # Only successes count as done; items that errored are retried
+            failed_ids = set()
+            with open(progress_file, "rb") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    record = json_loads(line)
+                    item_id = record.get("item_id")
+                    if record.get("error"):
+                        failed_ids.add(item_id)
+                    elif item_id not in scraped_ids:
+                        scraped_ids.add(item_id)
+                        add_product(record)
+            failed_ids -= scraped_ids
+            print(f"Resuming: {stats['products']} done, retrying {len(failed_ids)} earlier errors", flush=True)
+
+        pending = queue.Queue()
         for i, item_id in enumerate(item_ids):
-            if item_id in scraped_ids:
-                continue
-
-            print(f"\n[{i+1}/{len(item_ids)}] {item_id}...", flush=True)
-            product = scrape_product(pg, item_id, skip_compat=args.skip_compat, full_compat=args.full_compat)
-
-            if product.get("error"):
-                print(f"  ERROR: {product['error']}", flush=True)
-                errors.append(product)
-            else:
-                cm = len(product.get("compatibility_makes", []))
-                cy = len(product.get("compatibility_years", []))
-                compat = f" | Compat: {cm} makes, {cy} years" if cm else ""
-                print(f"  {product.get('title', '')[:55]}", flush=True)
-                print(f"  {product.get('currency','GBP')} {product.get('price','?')} | {len(product.get('images',[]))} imgs{compat}", flush=True)
-                products.append(product)
-
-            if (i + 1) % 5 == 0:
-                with open(progress_file, "w") as f:
-                    json.dump({"products": products, "errors": errors}, f)
-
-            time.sleep(DELAY_BETWEEN_PRODUCTS)
-
-        browser.close()
-
-    # Save JSON
-    with open(json_output, "w") as f:
-        json.dump(products, f, indent=2)
-
-    # Save final progress
-    with open(progress_file, "w") as f:
-        json.dump({"products": products, "errors": errors}, f)
-
-    # PHASE 4: Generate CSV
-    print("\n--- Phase 4: Generating Shopify CSV ---", flush=True)
-    generate_shopify_csv(products, csv_output)
+            if item_id not in scraped_ids:
+                pending.put((i, item_id))
+
+        with open(progress_file, "ab" if args.resume else "wb") as progress:
+            lock = threading.Lock()
+
+            def record_result(i, product):
+                with lock:
+                    print(f"\n[{i+1}/{len(item_ids)}] {product['item_id']}...", flush=True)
+                    progress.write(json_line(product))
+                    progress.flush()
+
+                    if product.get("error"):
+                        print(f"  ERROR: {product['error']}", flush=True)
+                        errors.append(product)
+                    else:
+                        cm = len(product.get("compatibility_makes", []))
+                        cy = len(product.get("compatibility_years", []))
+                        compat = f" | Compat: {cm} makes, {cy} years" if cm else ""
+                        print(f"  {product.get('title', '')[:55]}", flush=True)
+                        print(f"  {product.get('currency','GBP')} {product.get('price','?')} | {len(product.get('images',[]))} imgs{compat}", flush=True)
+                        add_product(product)
+
+            workers = min(args.workers, pending.qsize())
+            stop = threading.Event()
+            if workers > 0:
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    futures = [
+                        pool.submit(scrape_worker, pending, record_result, profile_root / f"worker-{n}", delay,
+                                    stop, args.skip_compat, args.full_compat, args.compat_stagnant_pages,
+                                    args.headed)
+                        for n in range(1, workers + 1)
+                    ]
+                    try:
+                        for future in futures:
+                            future.result()
+                    except KeyboardInterrupt:
+                        # Workers finish their current product, then exit; progress is kept
+                        print("\nInterrupted: finishing in-flight products...", flush=True)
+                        stop.set()
+
+    unscraped = pending.qsize()
+
+    print(f"\nShopify CSV: {csv_output}", flush=True)
+    print(f"Products: {stats['products']} | CSV rows: {stats['rows']}", flush=True)
+
+    # Optional JSON export, streamed from the progress log
+    if args.json:
+        export_products_json(progress_file, json_output)
 
     # Report
-    with_compat = len([p for p in products if p.get("compatibility_makes")])
     print(f"\n{'='*60}", flush=True)
     print(f"SCRAPE COMPLETE", flush=True)
     print(f"{'='*60}", flush=True)
-    print(f"Products:        {len(products)}", flush=True)
-    print(f"With compat:     {with_compat}", flush=True)
+    print(f"Products:        {stats['products']}", flush=True)
+    print(f"With compat:     {stats['with_compat']}", flush=True)
     print(f"Errors:          {len(errors)}", flush=True)
-    print(f"JSON:            {json_output}", flush=True)
+    if unscraped:
+        print(f"Not scraped:     {unscraped} (rerun with --resume)", flush=True)
+    print(f"Progress log:    {progress_file}", flush=True)
+    if args.json:
+        print(f"JSON:            {json_output}", flush=True)
     print(f"Shopify CSV:     {csv_output}", flush=True)
     print(f"{'='*60}", flush=True)
 
@@ -1,12 +1,21 @@
 """
 Quick script to fetch each category URL and extract product links from the page HTML.
-Uses requests + BeautifulSoup to parse without needing a full browser.
+Uses requests + selectolax (C-backed Lexbor parser) to parse without needing a full browser,
+falling back to BeautifulSoup when selectolax is not installed.
 """
 import requests
-from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import time
 import sys
 
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:  # Optional: falls back to BeautifulSoup's html.parser
+    LexborHTMLParser = None
+    from bs4 import BeautifulSoup
+
 DOMAIN = "https://www.argocityltd.com"
 SEED_FILE = "scraped-sites/argocityltd-com/seed-urls.txt"
 OUTPUT_FILE = "scraped-sites/argocityltd-com/product-urls.txt"
@@ -15,16 +24,34 @@ HEADERS = {
     "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
 }
 
+MAX_WORKERS = 8
+REQUEST_DELAY = 0.05
+
+def make_session():
+    """Create a session with a connection pool sized for MAX_WORKERS and retries on transient errors."""
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    retry = Retry(total=2, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504), raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def product_link_hrefs(html):
+    """Return the href of every a.product-item-link on the page."""
+    if LexborHTMLParser is not None:
+        return [a.attributes.get("href") or "" for a in LexborHTMLParser(html).css("a.product-item-link")]
+    soup = BeautifulSoup(html, "html.parser")
+    return [a.get("href", "") for a in soup.select("a.product-item-link")]
+
 def extract_products_from_category(url, session):
     """Fetch a category page and extract product links."""
     try:
-        resp = session.get(url, headers=HEADERS, timeout=15)
+        resp = session.get(url, timeout=15)
         if resp.status_code != 200:
             return [], resp.status_code
-        soup = BeautifulSoup(resp.text, "html.parser")
         products = set()
-        for a in soup.select("a.product-item-link"):
-            href = a.get("href", "")
+        for href in product_link_hrefs(resp.text):
             if href and "argocityltd.com" in href and "#" not in href:
                 products.add(href.strip())
         return list(products), 200
@@ -39,32 +66,37 @@ def main():
     print(f"Loaded {len(category_urls)} category URLs")
 
     all_products = set()
-    session = requests.Session()
+    session = make_session()
 
     working_categories = 0
     error_categories = 0
     categories_with_products = 0
 
-    for i, url in enumerate(category_urls):
-        products, status = extract_products_from_category(url, session)
-        if status == 200:
-            working_categories += 1
-            if products:
-                categories_with_products += 1
-                new_products = [p for p in products if p not in all_products]
-                all_products.update(products)
-                if new_products:
-                    print(f"  [{i+1}/{len(category_urls)}] {url} -> {len(products)} products ({len(new_products)} new)")
+    def fetch(url):
+        result = extract_products_from_category(url, session)
+        # Small delay to be polite
+        time.sleep(REQUEST_DELAY)
+        return result
+
+    # Fetch in parallel over the shared pool; map() yields results in input order
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        results = executor.map(fetch, category_urls)
+        for i, (url, (products, status)) in enumerate(zip(category_urls, results)):
+            if status == 200:
+                working_categories += 1
+                if products:
+                    categories_with_products += 1
+                    new_products = [p for p in products if p not in all_products]
+                    all_products.update(products)
+                    if new_products:
+                        print(f"  [{i+1}/{len(category_urls)}] {url} -> {len(products)} products ({len(new_products)} new)")
+                    else:
+                        print(f"  [{i+1}/{len(category_urls)}] {url} -> {len(products)} products (all duplicates)")
                 else:
-                    print(f"  [{i+1}/{len(category_urls)}] {url} -> {len(products)} products (all duplicates)")
+                    print(f"  [{i+1}/{len(category_urls)}] {url} -> 0 products")
             else:
-                print(f"  [{i+1}/{len(category_urls)}] {url} -> 0 products")
-        else:
-            error_categories += 1
-            print(f"  [{i+1}/{len(category_urls)}] {url} -> ERROR {status}")
-
-        # Small delay to be polite
-        time.sleep(0.3)
+                error_categories += 1
+                print(f"  [{i+1}/{len(category_urls)}] {url} -> ERROR {status}")
 
     # Write product URLs
     with open(OUTPUT_FILE, "w") as f:
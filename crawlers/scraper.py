@@ -25,20 +25,50 @@ Output files are named: {domain}-{type}.csv and {domain}-{type}_unique.csv
 
 import argparse
 import csv
+import hashlib
 import json
+import math
 import os
 import re
 import sys
+import time
 from datetime import datetime
+from functools import lru_cache
+from io import BytesIO
 from pathlib import Path
-from urllib.parse import urljoin, urlparse
+from types import MappingProxyType
+from urllib.parse import urljoin, urlparse, urlsplit
 
+from lxml import etree
+from lxml.html import HTMLParser
+from parsel.csstranslator import HTMLTranslator
 from scrapy import Spider, signals
 from scrapy.crawler import CrawlerProcess
+from scrapy.downloadermiddlewares.httpcompression import HttpCompressionMiddleware
+from scrapy.dupefilters import RFPDupeFilter
+from scrapy.link import Link
 from scrapy.linkextractors import LinkExtractor
 from scrapy.spidermiddlewares.httperror import HttpError
+from scrapy.utils.response import get_base_url
 from twisted.internet.error import DNSLookupError, TCPTimedOutError, TimeoutError
 
+try:
+    import orjson
+except ImportError:  # Optional: falls back to the stdlib json module
+    orjson = None
+
+try:
+    import ahocorasick
+except ImportError:  # Optional: image filtering falls back to IMAGE_EXCLUDE_RE
+    ahocorasick = None
+
+try:
+    from isal import igzip, isal_zlib
+    from scrapy.utils._compression import _CHUNK_SIZE, _check_max_size
+    from scrapy.utils.gz import gunzip
+except ImportError:  # Optional: gzip bodies use Scrapy's own zlib gunzip
+    igzip = isal_zlib = None
+
 
 # =============================================================================
 # SCRAPE TYPE CONFIGURATIONS
@@ -106,49 +136,158 @@ SCRAPE_CONFIGS = {
     },
 }
 
-# Common URL patterns to always exclude
-DEFAULT_DENY_PATTERNS = [
-    r'/cart/',
-    r'/checkout/',
-    r'/account/',
-    r'/login/',
-    r'/register/',
-    r'/my-account/',
-    r'/admin/',
-    r'/wp-admin/',
-    r'/wp-login/',
-    r'\?add-to-cart=',
-    r'\?remove_item=',
-    r'/wishlist/',
-    r'/compare/',
-]
+# Freeze into read-only views with tuple pattern lists; configs never change mid-crawl
+SCRAPE_CONFIGS = MappingProxyType({
+    name: MappingProxyType({**cfg, "url_patterns": tuple(cfg["url_patterns"])})
+    for name, cfg in SCRAPE_CONFIGS.items()
+})
+
+# Request pacing presets for --preset; --delay/--concurrent/--autothrottle override
+CRAWL_PRESETS = {
+    "polite": {"delay": 1.0, "concurrent": 2, "autothrottle": False},
+    "fast": {"delay": 0.25, "concurrent": 8, "autothrottle": True},
+}
 
-# Image patterns to exclude (icons, placeholders, etc.)
+# 429 backoff: double the host's download delay (up to the cap) on each rate-limit
+# response, halve it back towards its pre-backoff value after this many
+# consecutive successful pages. Off under AutoThrottle, which owns the delay.
+RATE_LIMIT_MAX_DELAY = 60.0
+RATE_LIMIT_RECOVERY_PAGES = 10
+
+# URLs to always exclude: any path containing /<segment>/ for these segments...
+DENY_PATH_SEGMENTS = frozenset([
+    'cart',
+    'checkout',
+    'account',
+    'login',
+    'register',
+    'my-account',
+    'admin',
+    'wp-admin',
+    'wp-login',
+    'wishlist',
+    'compare',
+])
+
+# ...and any "?" followed by these (WooCommerce cart actions). A query containing
+# /<segment>/ (e.g. ?next=/account/) is denied too, see DENY_QUERY_RE
+DENY_QUERY_PREFIXES = (
+    'add-to-cart=',
+    'remove_item=',
+)
+
+# Image URL substrings to exclude (icons, placeholders, etc.), case-insensitive.
+# Plain literals, not regexes, so they can be matched in one automaton pass.
 IMAGE_EXCLUDE_PATTERNS = [
-    r'placeholder',
-    r'loading',
-    r'spinner',
-    r'icon',
-    r'pixel',
-    r'tracking',
-    r'spacer',
-    r'blank',
-    r'1x1',
-    r'transparent',
-    r'/wp-includes/',
-    r'/wp-content/plugins/',
-    r'gravatar\.com',
+    'placeholder',
+    'loading',
+    'spinner',
+    'icon',
+    'pixel',
+    'tracking',
+    'spacer',
+    'blank',
+    '1x1',
+    'transparent',
+    '/wp-includes/',
+    '/wp-content/plugins/',
+    'gravatar.com',
 ]
 
-# Compiled patterns for page classification (used by Full Monty)
-CATEGORY_PATTERNS = [re.compile(p, re.IGNORECASE) for p in SCRAPE_CONFIGS["category"]["url_patterns"]]
-PRODUCT_PATTERNS = [re.compile(p, re.IGNORECASE) for p in SCRAPE_CONFIGS["product"]["url_patterns"]]
+
+def _union_regex(patterns, flags=0):
+    """Compile a list of regex strings into a single alternation pattern."""
+    return re.compile("|".join(f"(?:{p})" for p in patterns), flags)
+
+
+# Compiled patterns: one alternation per list, so each check is a single search()
+CATEGORY_RE = _union_regex(SCRAPE_CONFIGS["category"]["url_patterns"], re.IGNORECASE)
+PRODUCT_RE = _union_regex(SCRAPE_CONFIGS["product"]["url_patterns"], re.IGNORECASE)
+# Matched against the lowercased URL: re.IGNORECASE disables the literal
+# prefix scan and is several times slower on these all-literal patterns
+IMAGE_EXCLUDE_RE = _union_regex(re.escape(p.lower()) for p in IMAGE_EXCLUDE_PATTERNS)
+
+# Deny checks for the query string only (the path uses the segment set): the
+# same /<segment>/ and ?<prefix> substrings the deny list matches anywhere
+DENY_QUERY_RE = _union_regex(
+    [re.escape(f"/{seg}/") for seg in sorted(DENY_PATH_SEGMENTS)]
+    + [re.escape(f"?{prefix}") for prefix in DENY_QUERY_PREFIXES]
+)
+
+# Per-element / per-page extraction patterns
+BG_URL_RE = re.compile(r'url\(["\']?([^"\')\s]+)["\']?\)')
+PRICE_RE = re.compile(r'[\d,.]+')
+# WordPress-style resized variant suffix, e.g. photo-300x200.jpg
+IMAGE_SIZE_SUFFIX_RE = re.compile(r'-\d{2,4}x\d{2,4}(?=\.[A-Za-z0-9]+$)')
+# Netloc of an absolute or protocol-relative href; no match means a relative link
+NETLOC_RE = re.compile(r'(?:[a-zA-Z][a-zA-Z0-9+.-]*:)?//([^/?#]*)')
+# Leading URL scheme ("mailto:", "tel:"), for hrefs NETLOC_RE didn't match
+SCHEME_RE = re.compile(r'([a-zA-Z][a-zA-Z0-9+.-]*):')
+
+
+def _build_automaton(words):
+    """Build an Aho-Corasick automaton matching any of the given lowercase words."""
+    automaton = ahocorasick.Automaton()
+    for word in words:
+        automaton.add_word(word.lower(), word)
+    automaton.make_automaton()
+    return automaton
+
+
+# Single-pass multi-substring matcher for image exclusion (when pyahocorasick is installed)
+IMAGE_EXCLUDE_AC = _build_automaton(IMAGE_EXCLUDE_PATTERNS) if ahocorasick else None
+
+
+@lru_cache(maxsize=8192)
+def _is_excluded_image(url):
+    """Check an image URL against IMAGE_EXCLUDE_PATTERNS.
+
+    Cached because logos, sprites and CDN assets recur on every page.
+    """
+    url = url.lower()
+    if IMAGE_EXCLUDE_AC is not None:
+        return next(IMAGE_EXCLUDE_AC.iter(url), None) is not None
+    return IMAGE_EXCLUDE_RE.search(url) is not None
+
+
+@lru_cache(maxsize=131072)
+def _url_path(url):
+    """Return urlparse(url).path, cached since the same URLs are seen repeatedly."""
+    return urlparse(url).path
+
+
+@lru_cache(maxsize=131072)
+def _is_denied(url):
+    """Check a URL against DENY_PATH_SEGMENTS and DENY_QUERY_PREFIXES.
+
+    Uses a set intersection on the path segments; DENY_QUERY_RE only runs
+    when the URL has a query, e.g. /login?next=/account/ or ?add-to-cart=1.
+    """
+    parts = urlsplit(url)
+    if not DENY_PATH_SEGMENTS.isdisjoint(parts.path.split("/")[1:-1]):
+        return True
+    return bool(parts.query) and DENY_QUERY_RE.search("?" + parts.query) is not None
+
+
+@lru_cache(maxsize=65536)
+def _classify_by_regex(path, _product=PRODUCT_RE.search, _category=CATEGORY_RE.search):
+    """Classify a URL path by pattern alone.
+
+    Cached because menu, pagination and faceted-nav links repeat heavily
+    across a crawl. Call _classify_by_regex.cache_clear() to free memory.
+    The bound search methods are default args so they are local lookups.
+    """
+    if _product(path):
+        return "product"
+    if _category(path):
+        return "category"
+    return "other"
 
 
 def classify_page(url, known_product_urls=None, known_category_urls=None):
     """Classify a URL as 'product', 'category', or 'other'.
 
-    If known_product_urls or known_category_urls sets are provided,
+    If known_product_urls or known_category_urls (frozen)sets are provided,
     classification is done by lookup first (for sites with non-standard
     URL patterns). Falls back to regex pattern matching.
     """
@@ -159,14 +298,350 @@ def classify_page(url, known_product_urls=None, known_category_urls=None):
         return "category"
 
     # Priority 2: Regex pattern matching on URL path
-    path = urlparse(url).path
-    for pattern in PRODUCT_PATTERNS:
-        if pattern.search(path):
-            return "product"
-    for pattern in CATEGORY_PATTERNS:
-        if pattern.search(path):
-            return "category"
-    return "other"
+    return _classify_by_regex(_url_path(url))
+
+
+def _url_joiner(base_url):
+    """Return a join(src) equivalent to urljoin(base_url, src), with fast paths.
+
+    Root-relative, protocol-relative and absolute http(s) sources with a
+    host are built by concatenation; anything urljoin would normalise (dot
+    segments, whitespace, empty query/fragment/params, IPv6 brackets) or
+    resolve against the base goes through urljoin.
+    """
+    parts = urlsplit(base_url)
+    origin = f"{parts.scheme}://{parts.netloc}"
+    scheme_colon = parts.scheme + ":"
+
+    def join(src):
+        if (src.isprintable() and src[-1:] not in ("?", "#", "")
+                and ";" not in src and "?#" not in src
+                and "[" not in src and "]" not in src):
+            if src.startswith("//"):
+                if src[2:3] not in ("", "/", "?", "#"):
+                    return scheme_colon + src
+            elif src.startswith("/"):
+                if "/." not in src:
+                    return origin + src
+            elif src.startswith(("https://", "http://")):
+                if src.partition("://")[2][:1] not in ("", "/", "?", "#"):
+                    return src
+        return urljoin(base_url, src)
+
+    return join
+
+
+@lru_cache(maxsize=65536)
+def canonical_image_url(url):
+    """Collapse CDN/resized variants of an image URL: drop the query and any -WxH suffix."""
+    return IMAGE_SIZE_SUFFIX_RE.sub("", url.partition("?")[0], count=1)
+
+
+# =============================================================================
+# DUPLICATE FILTERING
+# =============================================================================
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings or bytes, backed by a bytearray.
+
+    Sized for `capacity` items at `error_rate` false positives (~1.8 MB for
+    1M items at 0.1%). Lookups may report an unseen item as seen, never the
+    reverse.
+    """
+
+    def __init__(self, capacity=1_000_000, error_rate=0.001):
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, item):
+        # Double hashing: k bit positions from two 64-bit halves of one digest
+        if isinstance(item, str):
+            item = item.encode("utf-8")
+        digest = hashlib.blake2b(item, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, item):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def update(self, items):
+        for item in items:
+            self.add(item)
+
+    def __contains__(self, item):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class BloomDupeFilter(RFPDupeFilter):
+    """Request dupefilter that keeps fingerprints in a Bloom filter instead of a set.
+
+    Trades exact dedup for ~14 bits per URL on very large crawls; a false
+    positive means an occasional page is skipped, never crawled twice.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Raw fingerprints restored from JOBDIR, if any, move into the filter
+        self.bloom = BloomFilter()
+        restored = getattr(self, "_fingerprints", None)
+        if restored:
+            self.bloom.update(restored)
+            restored.clear()
+
+    def request_seen(self, request):
+        fp = bytes.fromhex(self.request_fingerprint(request))
+        if fp in self.bloom:
+            return True
+        self.bloom.add(fp)
+        if self.file:
+            # Same record format as RFPDupeFilter: 2-byte length, then the fingerprint
+            self.file.write(len(fp).to_bytes(2, "big") + fp)
+        return False
+
+
+# =============================================================================
+# RESPONSE DECOMPRESSION
+# =============================================================================
+
+
+def _isal_gunzip(data, *, max_size=0):
+    """Gunzip with ISA-L's SIMD inflate, keeping scrapy.utils.gz.gunzip's size cap.
+
+    Truncated or corrupt bodies are handed to Scrapy's gunzip, which salvages
+    more of a damaged stream than ISA-L's block-wise reader.
+    """
+    f = igzip.GzipFile(fileobj=BytesIO(data))
+    chunks = []
+    decompressed_size = 0
+    while True:
+        try:
+            chunk = f.read1(_CHUNK_SIZE)
+        except (OSError, EOFError, isal_zlib.error):
+            return gunzip(data, max_size=max_size)
+        if not chunk:
+            break
+        decompressed_size += len(chunk)
+        _check_max_size(decompressed_size, max_size)
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+class IsalHttpCompressionMiddleware(HttpCompressionMiddleware):
+    """HttpCompressionMiddleware that inflates gzip bodies with python-isal."""
+
+    @staticmethod
+    def _decode(body, encoding, max_size):
+        if encoding in (b"gzip", b"x-gzip"):
+            return _isal_gunzip(body, max_size=max_size)
+        return HttpCompressionMiddleware._decode(body, encoding, max_size)
+
+
+# =============================================================================
+# COMPILED SELECTORS
+# =============================================================================
+
+
+# One recovering HTML parser reused for every page (the crawl is single-threaded)
+HTML_PARSER = HTMLParser(recover=True, encoding="utf-8", huge_tree=True, collect_ids=False)
+
+
+def _parse_html(response):
+    """Parse a response into an lxml tree with the shared HTML_PARSER.
+
+    Same input handling as parsel's response.selector, without building a
+    Selector and a fresh parser for every page.
+    """
+    body = response.text.strip().replace("\x00", "").encode("utf-8") or b"<html/>"
+    root = etree.fromstring(body, parser=HTML_PARSER, base_url=response.url)
+    if root is None:
+        root = etree.fromstring(b"<html/>", parser=HTML_PARSER, base_url=response.url)
+    return root
+
+
+def _xpath(expr):
+    """Compile an XPath once; results are plain str rather than lxml smart strings."""
+    return etree.XPath(expr, smart_strings=False)
+
+
+def _xpath_first(xpath, root):
+    """Return the first result of a compiled XPath, or None (like SelectorList.get())."""
+    result = xpath(root)
+    return result[0] if result else None
+
+
+# Evaluated directly against the parsed lxml root, so each expression is
+# parsed and compiled once per process instead of once per page
+XP_TITLE = _xpath("//title/text()")
+XP_META_DESCRIPTION = _xpath("//meta[@name='description']/@content")
+XP_H1_TEXT = _xpath("//h1//text()")
+XP_CANONICAL = _xpath("//link[@rel='canonical']/@href")
+XP_OG_IMAGE = _xpath("//meta[@property='og:image']/@content")
+XP_OG_TITLE = _xpath("//meta[@property='og:title']/@content")
+XP_OG_DESCRIPTION = _xpath("//meta[@property='og:description']/@content")
+XP_LINK_HREFS = _xpath(".//a/@href | .//area/@href")
+XP_LD_JSON = _xpath('//script[@type="application/ld+json"]/text()')
+XP_ITEMPROP_NAME = _xpath('//*[@itemprop="name"]/text()')
+XP_ITEMPROP_PRICE = _xpath('//*[@itemprop="price"]/@content')
+XP_ITEMPROP_PRICE_TEXT = _xpath('//*[@itemprop="price"]/text()')
+XP_ITEMPROP_SKU = _xpath('//*[@itemprop="sku"]/@content')
+XP_ITEMPROP_SKU_TEXT = _xpath('//*[@itemprop="sku"]/text()')
+XP_ITEMPROP_BRAND = _xpath('//*[@itemprop="brand"]//text()')
+
+
+# Common CSS class patterns for price, translated to XPath once
+PRICE_SELECTORS = [
+    '.price ::text', '.product-price ::text',
+    '.current-price ::text', '[data-price] ::text',
+    '.woocommerce-Price-amount ::text',
+]
+XP_PRICE_FALLBACKS = [
+    _xpath(HTMLTranslator().css_to_xpath(selector)) for selector in PRICE_SELECTORS
+]
+
+
+def _count_body_words(root):
+    """Count words in the <body> text nodes by walking the tree.
+
+    Same result as splitting the space-joined //body//text() nodes, but
+    without materialising them. Comment and PI contents are skipped;
+    their tails are body text.
+    """
+    body = root.find("body")
+    if body is None:
+        return 0
+    count = 0
+    for el in body.iter():
+        if el.text and isinstance(el.tag, str):
+            count += len(el.text.split())
+        if el.tail and el is not body:
+            count += len(el.tail.split())
+    return count
+
+
+def _scan_elements(root):
+    """Collect <img>s, url() styles and link hrefs in one pass over the tree.
+
+    Returns (imgs, bg_styles, a_hrefs, link_hrefs) in document order; bg_styles
+    holds only style attributes containing "url(" so BG_URL_RE skips the rest,
+    link_hrefs covers <a> and <area> (what gets followed), a_hrefs only <a>.
+    """
+    imgs, bg_styles, a_hrefs, link_hrefs = [], [], [], []
+    for el in root.iter(etree.Element):
+        tag = el.tag
+        attrs = el.attrib
+        if tag == "img":
+            imgs.append(el)
+        elif tag == "a" or tag == "area":
+            href = attrs.get("href")
+            if href is not None:
+                link_hrefs.append(href)
+                if tag == "a":
+                    a_hrefs.append(href)
+        style = attrs.get("style")
+        if style and "url(" in style:
+            bg_styles.append(style)
+    return imgs, bg_styles, a_hrefs, link_hrefs
+
+
+# =============================================================================
+# SCHEMA.ORG HANDLERS
+# =============================================================================
+
+
+def _apply_product_schema(item, result):
+    """Copy Product fields from a JSON-LD item into result; empty fields are skipped."""
+    name = item.get("name")
+    if name:
+        result["product_name"] = name
+    description = item.get("description")
+    if description:
+        result["product_description"] = description
+    sku = item.get("sku")
+    if sku:
+        result["product_sku"] = sku
+
+    brand = item.get("brand")
+    if isinstance(brand, dict):
+        brand = brand.get("name")
+    if brand:
+        result["product_brand"] = brand if isinstance(brand, str) else str(brand)
+
+    offers = item.get("offers", {})
+    if isinstance(offers, list):
+        offers = offers[0] if offers else {}
+    if isinstance(offers, dict):
+        price = str(offers.get("price", ""))
+        if price:
+            result["product_price"] = price
+        currency = offers.get("priceCurrency")
+        if currency:
+            result["product_currency"] = currency
+        # "https://schema.org/InStock" -> "InStock"
+        availability = offers.get("availability", "").rpartition("schema.org/")[2]
+        if availability:
+            result["product_availability"] = availability
+
+
+# Schema.org @type -> function that copies its fields into the page result
+SCHEMA_HANDLERS = {
+    "Product": _apply_product_schema,
+}
+
+
+# =============================================================================
+# LINK EXTRACTION
+# =============================================================================
+
+
+class FastLinkExtractor(LinkExtractor):
+    """LinkExtractor that collects hrefs with a single libxml2 XPath query.
+
+    Skips Scrapy's per-element Python walk. Only honours allow,
+    allow_domains and deny_extensions, which is all this spider sets,
+    plus the DENY_PATH_SEGMENTS / DENY_QUERY_PREFIXES checks.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._domain_suffixes = tuple("." + d for d in self.allow_domains)
+        # Bare lowercase extensions ("pdf"), matched against the last path segment
+        self._deny_ext = frozenset(ext.lstrip(".").lower() for ext in self.deny_extensions)
+
+    def extract_urls(self, response, hrefs=None):
+        """Return the followable absolute URLs on the page, as plain strings.
+
+        Pass hrefs when the raw <a>/<area> hrefs were already collected.
+        """
+        base_url = get_base_url(response)
+        if hrefs is None:
+            hrefs = XP_LINK_HREFS(response.selector.root)
+        urls = []
+        # Fragments never reach the server, so drop them before deduping
+        joined = (urljoin(base_url, href.strip()).partition("#")[0] for href in hrefs)
+        for url in dict.fromkeys(joined):
+            parts = urlsplit(url)
+            if parts.scheme not in ("http", "https"):
+                continue
+            host = parts.hostname or ""
+            if self.allow_domains and host not in self.allow_domains \
+                    and not host.endswith(self._domain_suffixes):
+                continue
+            _, dot, ext = parts.path.rpartition("/")[2].rpartition(".")
+            if dot and ext.lower() in self._deny_ext:
+                continue
+            if self.allow_res and not any(r.search(url) for r in self.allow_res):
+                continue
+            if _is_denied(url):
+                continue
+            urls.append(url)
+        return urls
+
+    def extract_links(self, response):
+        return [Link(url=url) for url in self.extract_urls(response)]
 
 
 # =============================================================================
@@ -183,18 +658,27 @@ class ScraperSpider(Spider):
         super().__init__(*args, **kwargs)
         self.config = config
         self.results = []
-        self.errors = []
+        self.pages_with_images = 0
+        # 429 backoff state (see _back_off / _recover): download slot key -> delay before backoff
+        self.pre_backoff_delay = {}
+        self.rate_limited = False
+        self.ok_streak = 0
+        # Standard mode streams page rows here as pages are parsed (see _write_page_rows)
+        self.page_csv = None
+        self.page_writer = None
+        self.errors = []  # "timestamp" is epoch seconds; format with datetime.fromtimestamp
         self.pages_crawled = 0
-        self.all_images = {}
+        # Unique images as parallel columns keyed by image URL (no per-image dict)
+        self.image_found_on = {}
+        self.image_alt = {}
 
-        # Known URL sets for page classification (used by Full Monty)
-        self.known_product_urls = set(config.get("known_product_urls", []))
-        self.known_category_urls = set(config.get("known_category_urls", []))
+        # Known URL sets for page classification (used by Full Monty).
+        # Frozen once and interned so lookups of interned URLs compare by identity.
+        self.known_product_urls = frozenset(sys.intern(u) for u in config.get("known_product_urls", []))
+        self.known_category_urls = frozenset(sys.intern(u) for u in config.get("known_category_urls", []))
 
-        # Compile image exclusion patterns
-        self.image_exclude_patterns = [
-            re.compile(p, re.IGNORECASE) for p in IMAGE_EXCLUDE_PATTERNS
-        ]
+        # URLs already yielded as requests; skipped before Scrapy fingerprints them
+        self.queued_urls = BloomFilter() if config.get("bloom_dedup") else set()
 
         # Set up allowed domains
         domain = config["domain"]
@@ -215,10 +699,9 @@ class ScraperSpider(Spider):
         scrape_type = config["scrape_type"]
         url_patterns = SCRAPE_CONFIGS[scrape_type]["url_patterns"]
 
-        self.link_extractor = LinkExtractor(
+        self.link_extractor = FastLinkExtractor(
             allow_domains=self.allowed_domains,
-            allow=url_patterns if url_patterns else (),
-            deny=DEFAULT_DENY_PATTERNS,
+            allow=[_union_regex(url_patterns)] if url_patterns else (),
             deny_extensions=[
                 "jpg", "jpeg", "png", "gif", "svg", "webp", "ico", "bmp",
                 "pdf", "doc", "docx", "xls", "xlsx", "ppt", "pptx",
@@ -231,7 +714,7 @@ class ScraperSpider(Spider):
     @classmethod
     def create_settings(cls, config):
         """Create Scrapy settings from config."""
-        return {
+        settings = {
             "DOWNLOAD_DELAY": config.get("delay", 1.0),
             "CONCURRENT_REQUESTS": config.get("concurrent", 2),
             "CONCURRENT_REQUESTS_PER_DOMAIN": config.get("concurrent", 2),
@@ -244,10 +727,39 @@ class ScraperSpider(Spider):
             ),
             "LOG_LEVEL": config.get("log_level", "INFO"),
             "DOWNLOAD_TIMEOUT": 30,
+            # Bound per-response memory: abort bodies over 16 MB, warn over 4 MB
+            "DOWNLOAD_MAXSIZE": 16 * 1024 * 1024,
+            "DOWNLOAD_WARNSIZE": 4 * 1024 * 1024,
             "RETRY_TIMES": 2,
             "RETRY_HTTP_CODES": [500, 502, 503, 504, 408, 429],
             "HTTPERROR_ALLOW_ALL": True,
+            # Scrapy's default, made explicit: gzip/deflate always, and br/zstd
+            # are advertised too when brotli/zstandard are installed
+            "COMPRESSION_ENABLED": True,
+            # Larger thread pool so DNS lookups don't serialise at higher concurrency
+            "REACTOR_THREADPOOL_MAXSIZE": 20,
+            # Run Twisted on top of asyncio's selector loop (Scrapy's default since 2.13)
+            "TWISTED_REACTOR": "twisted.internet.asyncioreactor.AsyncioSelectorReactor",
         }
+        if config.get("autothrottle"):
+            # Let AutoThrottle adapt the delay to server latency, starting from
+            # --delay and aiming for --concurrent requests in flight
+            settings.update({
+                "DOWNLOAD_DELAY": 0,
+                "AUTOTHROTTLE_ENABLED": True,
+                "AUTOTHROTTLE_START_DELAY": config.get("delay", 1.0),
+                "AUTOTHROTTLE_MAX_DELAY": 10.0,
+                "AUTOTHROTTLE_TARGET_CONCURRENCY": float(config.get("concurrent", 2)),
+            })
+        if config.get("bloom_dedup"):
+            settings["DUPEFILTER_CLASS"] = BloomDupeFilter
+        if igzip is not None:
+            # Swap in the ISA-L gzip decoder at the built-in middleware's priority
+            settings["DOWNLOADER_MIDDLEWARES"] = {
+                "scrapy.downloadermiddlewares.httpcompression.HttpCompressionMiddleware": None,
+                IsalHttpCompressionMiddleware: 590,
+            }
+        return settings
 
     def parse(self, response):
         """Parse a page and extract images."""
@@ -260,25 +772,33 @@ class ScraperSpider(Spider):
             self._handle_http_error(response)
             if response.status >= 400:
                 return
+        elif self.rate_limited:
+            self._recover(response)
 
         self.pages_crawled += 1
+        # One shared string per page URL for the results, found_on lists and lookups
+        page_url = sys.intern(response.url)
+        # Parsed lxml tree, shared by every extractor below
+        root = _parse_html(response)
+        # Single walk for everything found by tag: images, inline styles, links
+        imgs, bg_styles, a_hrefs, link_hrefs = _scan_elements(root)
 
         # Extract images
-        images = self._extract_images(response)
+        images = self._extract_images(response, imgs, bg_styles)
 
         # Full Monty: extract all data (SEO, product, content metrics)
         if self.config["scrape_type"] == "fullmonty":
-            meta_data = self._extract_meta_data(response)
-            content_metrics = self._extract_content_metrics(response)
-            structured_data = self._extract_structured_data(response)
+            meta_data = self._extract_meta_data(root)
+            content_metrics = self._extract_content_metrics(response, root, imgs, a_hrefs)
+            structured_data = self._extract_structured_data(root)
             page_type = classify_page(
-                response.url,
+                page_url,
                 known_product_urls=self.known_product_urls,
                 known_category_urls=self.known_category_urls,
             )
 
             result = {
-                "page_url": response.url,
+                "page_url": page_url,
                 "page_type": page_type,
                 # SEO Data
                 "meta_title": meta_data["meta_title"],
@@ -306,9 +826,11 @@ class ScraperSpider(Spider):
                 "schema_types": structured_data["schema_types"],
                 # Images
                 "image_count": len(images),
-                "images": json.dumps(images),
+                "images": json_dumps(images),
             }
             self.results.append(result)
+            if images:
+                self.pages_with_images += 1
 
             self.logger.info(
                 f"Crawled [{page_type}]: {response.url} - "
@@ -317,19 +839,14 @@ class ScraperSpider(Spider):
         else:
             # Standard mode: only store results when images found
             page_title = (
-                response.xpath("//title/text()").get() or
-                response.xpath("//meta[@property='og:title']/@content").get() or
+                _xpath_first(XP_TITLE, root) or
+                _xpath_first(XP_OG_TITLE, root) or
                 ""
             ).strip()
 
             if images:
-                result = {
-                    "page_url": response.url,
-                    "page_title": page_title,
-                    "image_count": len(images),
-                    "images": json.dumps(images),
-                }
-                self.results.append(result)
+                self.pages_with_images += 1
+                self._write_page_rows(page_url, page_title, images)
 
                 self.logger.info(
                     f"Crawled: {response.url} - Found {len(images)} images"
@@ -338,47 +855,70 @@ class ScraperSpider(Spider):
                 self.logger.info(f"Crawled: {response.url} - No images found")
 
         # Track unique images (all modes)
+        merge_variants = self.config.get("merge_image_variants")
         for img in images:
-            img_url = img["src"]
-            if img_url not in self.all_images:
-                self.all_images[img_url] = {
-                    "src": img_url,
-                    "alt": img.get("alt", ""),
-                    "found_on": [response.url],
-                }
-            else:
-                self.all_images[img_url]["found_on"].append(response.url)
+            img_url = canonical_image_url(img["src"]) if merge_variants else img["src"]
+            pages = self.image_found_on.get(img_url)
+            if pages is None:
+                self.image_found_on[img_url] = [page_url]
+                self.image_alt[img_url] = img.get("alt", "")
+            elif pages[-1] is not page_url:
+                # Merged variants on one page share a key; list the page once
+                pages.append(page_url)
 
         # Follow links
-        for link in self.link_extractor.extract_links(response):
+        queued = self.queued_urls
+        for url in self.link_extractor.extract_urls(response, link_hrefs):
             if max_pages > 0 and self.pages_crawled >= max_pages:
                 break
+            if url in queued:
+                continue
+            queued.add(url)
             yield response.follow(
-                link.url,
+                url,
                 callback=self.parse,
                 errback=self._handle_error,
             )
 
-    def _extract_images(self, response):
+    def _write_page_rows(self, page_url, page_title, images):
+        """Append a page's image rows to {output_base}.csv, opening it on first use."""
+        if self.page_writer is None:
+            self.page_csv = open(f"{self.config['output_base']}.csv", "w", newline="",
+                                 encoding="utf-8", buffering=OUTPUT_BUFFER_SIZE)
+            self.page_writer = csv.writer(self.page_csv)
+            self.page_writer.writerow(PAGE_FIELDS)
+        self.page_writer.writerows(_image_rows(page_url, page_title, images))
+
+    def close_page_csv(self):
+        """Flush and close the streamed page CSV, if one was opened."""
+        if self.page_csv is not None:
+            self.page_csv.close()
+            self.page_csv = None
+            self.page_writer = None
+
+    def _extract_images(self, response, imgs, bg_styles):
         """Extract and filter images from the page."""
         images = []
         seen_urls = set()
         min_width = self.config.get("min_image_width", 50)
         min_height = self.config.get("min_image_height", 50)
+        join = _url_joiner(response.url)
 
-        for img in response.xpath("//img"):
+        # Read attributes straight off the lxml elements: one dict lookup each
+        for img in imgs:
+            attrs = img.attrib
             src = (
-                img.xpath("@src").get() or
-                img.xpath("@data-src").get() or
-                img.xpath("@data-lazy-src").get() or
-                img.xpath("@data-original").get() or
+                attrs.get("src") or
+                attrs.get("data-src") or
+                attrs.get("data-lazy-src") or
+                attrs.get("data-original") or
                 ""
             )
 
             if not src or src.startswith("data:"):
                 continue
 
-            src = urljoin(response.url, src)
+            src = join(src)
 
             if src in seen_urls:
                 continue
@@ -387,9 +927,9 @@ class ScraperSpider(Spider):
             if self._should_exclude_image(src):
                 continue
 
-            alt = img.xpath("@alt").get() or ""
-            width = img.xpath("@width").get()
-            height = img.xpath("@height").get()
+            alt = attrs.get("alt") or ""
+            width = attrs.get("width")
+            height = attrs.get("height")
 
             try:
                 w = int(width) if width else 0
@@ -409,11 +949,10 @@ class ScraperSpider(Spider):
             })
 
         # Check for background images
-        for element in response.xpath("//*[@style]"):
-            style = element.xpath("@style").get() or ""
-            bg_match = re.search(r'url\(["\']?([^"\')\s]+)["\']?\)', style)
+        for style in bg_styles:
+            bg_match = BG_URL_RE.search(style)
             if bg_match:
-                src = urljoin(response.url, bg_match.group(1))
+                src = join(bg_match.group(1))
                 if src not in seen_urls and not self._should_exclude_image(src):
                     seen_urls.add(src)
                     images.append({
@@ -427,48 +966,53 @@ class ScraperSpider(Spider):
 
     def _should_exclude_image(self, url):
         """Check if image URL matches exclusion patterns."""
-        return any(p.search(url) for p in self.image_exclude_patterns)
+        return _is_excluded_image(url)
 
-    def _extract_meta_data(self, response):
+    def _extract_meta_data(self, root):
         """Extract SEO and meta data from the page."""
         return {
-            "meta_title": (response.xpath("//title/text()").get() or "").strip(),
-            "meta_description": (
-                response.xpath("//meta[@name='description']/@content").get() or ""
-            ).strip(),
-            "h1": (response.xpath("//h1//text()").get() or "").strip(),
-            "canonical_url": (
-                response.xpath("//link[@rel='canonical']/@href").get() or ""
-            ).strip(),
-            "og_image": (
-                response.xpath("//meta[@property='og:image']/@content").get() or ""
-            ).strip(),
-            "og_title": (
-                response.xpath("//meta[@property='og:title']/@content").get() or ""
-            ).strip(),
-            "og_description": (
-                response.xpath("//meta[@property='og:description']/@content").get() or ""
-            ).strip(),
+            "meta_title": (_xpath_first(XP_TITLE, root) or "").strip(),
+            "meta_description": (_xpath_first(XP_META_DESCRIPTION, root) or "").strip(),
+            "h1": (_xpath_first(XP_H1_TEXT, root) or "").strip(),
+            "canonical_url": (_xpath_first(XP_CANONICAL, root) or "").strip(),
+            "og_image": (_xpath_first(XP_OG_IMAGE, root) or "").strip(),
+            "og_title": (_xpath_first(XP_OG_TITLE, root) or "").strip(),
+            "og_description": (_xpath_first(XP_OG_DESCRIPTION, root) or "").strip(),
         }
 
-    def _extract_content_metrics(self, response):
+    def _extract_content_metrics(self, response, root, imgs, a_hrefs):
         """Extract content metrics from the page."""
-        body_text = " ".join(response.xpath("//body//text()").getall())
-        body_text = re.sub(r'\s+', ' ', body_text).strip()
-        word_count = len(body_text.split()) if body_text else 0
+        word_count = _count_body_words(root)
 
-        total_images = len(response.xpath("//img").getall())
+        total_images = len(imgs)
 
-        all_links = response.xpath("//a/@href").getall()
+        all_links = a_hrefs
         domain = self.config["domain"]
+        # Relative links resolve to the page's own host, so classify them once
+        page_parts = urlsplit(response.url)
+        page_netloc = page_parts.netloc
+        relative_is_external = bool(page_netloc) and domain not in page_netloc
+        netloc_match = NETLOC_RE.match
+        scheme_match = SCHEME_RE.match
         internal_links = 0
         external_links = 0
         for href in all_links:
-            if not href or href.startswith("#") or href.startswith("javascript:"):
+            if not href or href.startswith(("#", "javascript:")):
                 continue
-            full_url = urljoin(response.url, href)
-            parsed = urlparse(full_url)
-            if parsed.netloc and domain not in parsed.netloc:
+            # urljoin ignores leading whitespace, so " https://x.com" is absolute
+            href = href.strip()
+            match = netloc_match(href)
+            if match is None:
+                scheme = scheme_match(href)
+                if scheme is not None and scheme.group(1).lower() != page_parts.scheme:
+                    # mailto:, tel: etc. have no host after urljoin: internal
+                    is_external = False
+                else:
+                    is_external = relative_is_external
+            else:
+                netloc = match.group(1)
+                is_external = bool(netloc) and domain not in netloc
+            if is_external:
                 external_links += 1
             else:
                 internal_links += 1
@@ -480,7 +1024,7 @@ class ScraperSpider(Spider):
             "external_link_count": external_links,
         }
 
-    def _extract_structured_data(self, response):
+    def _extract_structured_data(self, root):
         """Extract JSON-LD structured data from the page."""
         result = {
             "has_schema_markup": False,
@@ -494,14 +1038,12 @@ class ScraperSpider(Spider):
             "product_description": "",
         }
 
-        json_ld_scripts = response.xpath(
-            '//script[@type="application/ld+json"]/text()'
-        ).getall()
+        json_ld_scripts = XP_LD_JSON(root)
 
         schema_types = []
         for script_text in json_ld_scripts:
             try:
-                data = json.loads(script_text)
+                data = json_loads(script_text)
                 items = data if isinstance(data, list) else [data]
                 for item in items:
                     self._process_schema_item(item, result, schema_types)
@@ -516,35 +1058,26 @@ class ScraperSpider(Spider):
 
         # Fallback: microdata/itemprop attributes
         if not result["product_name"]:
-            result["product_name"] = (
-                response.xpath('//*[@itemprop="name"]/text()').get() or ""
-            ).strip()
+            result["product_name"] = (_xpath_first(XP_ITEMPROP_NAME, root) or "").strip()
         if not result["product_price"]:
             result["product_price"] = (
-                response.xpath('//*[@itemprop="price"]/@content').get() or
-                response.xpath('//*[@itemprop="price"]/text()').get() or ""
+                _xpath_first(XP_ITEMPROP_PRICE, root) or
+                _xpath_first(XP_ITEMPROP_PRICE_TEXT, root) or ""
             ).strip()
         if not result["product_sku"]:
             result["product_sku"] = (
-                response.xpath('//*[@itemprop="sku"]/@content').get() or
-                response.xpath('//*[@itemprop="sku"]/text()').get() or ""
+                _xpath_first(XP_ITEMPROP_SKU, root) or
+                _xpath_first(XP_ITEMPROP_SKU_TEXT, root) or ""
             ).strip()
         if not result["product_brand"]:
-            result["product_brand"] = (
-                response.xpath('//*[@itemprop="brand"]//text()').get() or ""
-            ).strip()
+            result["product_brand"] = (_xpath_first(XP_ITEMPROP_BRAND, root) or "").strip()
 
         # Fallback: common CSS class patterns for price
         if not result["product_price"]:
-            price_selectors = [
-                '.price ::text', '.product-price ::text',
-                '.current-price ::text', '[data-price] ::text',
-                '.woocommerce-Price-amount ::text',
-            ]
-            for selector in price_selectors:
-                price_text = response.css(selector).get()
+            for xpath in XP_PRICE_FALLBACKS:
+                price_text = _xpath_first(xpath, root)
                 if price_text:
-                    price_match = re.search(r'[\d,.]+', price_text.strip())
+                    price_match = PRICE_RE.search(price_text.strip())
                     if price_match:
                         result["product_price"] = price_match.group(0)
                         break
@@ -559,28 +1092,9 @@ class ScraperSpider(Spider):
         schema_types.append(item["@type"])
         result["has_schema_markup"] = True
 
-        if item["@type"] == "Product":
-            result["product_name"] = item.get("name", "") or result["product_name"]
-            result["product_description"] = item.get("description", "") or result["product_description"]
-            result["product_sku"] = item.get("sku", "") or result["product_sku"]
-
-            brand = item.get("brand")
-            if isinstance(brand, dict):
-                result["product_brand"] = brand.get("name", "") or result["product_brand"]
-            elif brand:
-                result["product_brand"] = str(brand) or result["product_brand"]
-
-            offers = item.get("offers", {})
-            if isinstance(offers, list):
-                offers = offers[0] if offers else {}
-            if isinstance(offers, dict):
-                result["product_price"] = str(offers.get("price", "")) or result["product_price"]
-                result["product_currency"] = offers.get("priceCurrency", "") or result["product_currency"]
-                availability = offers.get("availability", "")
-                result["product_availability"] = (
-                    availability.replace("https://schema.org/", "").replace("http://schema.org/", "")
-                    or result["product_availability"]
-                )
+        handler = SCHEMA_HANDLERS.get(item["@type"]) if isinstance(item["@type"], str) else None
+        if handler is not None:
+            handler(item, result)
 
     def _handle_http_error(self, response):
         """Handle HTTP errors."""
@@ -588,22 +1102,68 @@ class ScraperSpider(Spider):
             "url": response.url,
             "status": response.status,
             "error_type": "http_error",
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": time.time(),
         })
         if response.status == 429:
             self.logger.error(f"Rate limited (429): {response.url}")
+            self._back_off(response)
         elif response.status >= 500:
             self.logger.error(f"Server error ({response.status}): {response.url}")
         else:
             self.logger.warning(f"HTTP error ({response.status}): {response.url}")
 
+    def _download_slot(self, response):
+        """Return (key, slot) for the downloader slot (per-host queue) that fetched this response."""
+        key = response.request.meta.get("download_slot")
+        return key, self.crawler.engine.downloader.slots.get(key)
+
+    def _back_off(self, response):
+        """Double the host's download delay after a 429, up to RATE_LIMIT_MAX_DELAY.
+
+        Skipped under AutoThrottle: it rewrites the slot delay on every
+        response and caps it at AUTOTHROTTLE_MAX_DELAY anyway.
+        """
+        if self.config.get("autothrottle"):
+            return
+        key, slot = self._download_slot(response)
+        if slot is None:
+            return
+        self.pre_backoff_delay.setdefault(key, slot.delay)
+        slot.delay = min(max(slot.delay * 2, 1.0), RATE_LIMIT_MAX_DELAY)
+        self.rate_limited = True
+        self.ok_streak = 0
+        self.logger.warning(f"Backing off: download delay now {slot.delay:.1f}s")
+
+    def _recover(self, response):
+        """Halve a backed-off delay after RATE_LIMIT_RECOVERY_PAGES good pages in a row.
+
+        Stops at the slot's delay from before the first 429.
+        """
+        self.ok_streak += 1
+        if self.ok_streak < RATE_LIMIT_RECOVERY_PAGES:
+            return
+        self.ok_streak = 0
+        key, slot = self._download_slot(response)
+        base_delay = self.pre_backoff_delay.get(key)
+        if base_delay is None:
+            return
+        if slot is None:
+            # Scrapy dropped the idle slot; its replacement starts at the normal delay
+            del self.pre_backoff_delay[key]
+        else:
+            slot.delay = max(slot.delay / 2, base_delay)
+            self.logger.info(f"Recovering: download delay now {slot.delay:.1f}s")
+            if slot.delay <= base_delay:
+                del self.pre_backoff_delay[key]
+        self.rate_limited = bool(self.pre_backoff_delay)
+
     def _handle_error(self, failure):
         """Handle request failures."""
         request = failure.request
         error_info = {
             "url": request.url,
             "error_type": "request_failure",
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": time.time(),
         }
 
         if failure.check(HttpError):
@@ -619,12 +1179,35 @@ class ScraperSpider(Spider):
         self.errors.append(error_info)
         self.logger.error(f"Error on {request.url}: {error_info}")
 
+    def closed(self, reason):
+        """Close the page CSV and free the module-level URL caches."""
+        self.close_page_csv()
+        for cached in (_url_path, _is_denied, _classify_by_regex,
+                       canonical_image_url, _is_excluded_image):
+            cached.cache_clear()
+
 
 # =============================================================================
 # OUTPUT HANDLING
 # =============================================================================
 
 
+def json_dumps(obj):
+    """Serialize obj to a JSON str, using orjson when installed."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj)
+
+
+def json_loads(data):
+    """Parse JSON from str or bytes, using orjson when installed."""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+# Large write buffer so CSV rows are flushed to disk in big chunks
+OUTPUT_BUFFER_SIZE = 1 << 20
+
+
 def generate_output_path(domain, scrape_type):
     """Generate output path with folder structure and timestamp."""
     # Get the script's directory as base
@@ -645,41 +1228,60 @@ def generate_output_path(domain, scrape_type):
     return domain_folder / filename
 
 
+PAGE_FIELDS = ("page_url", "page_title", "image_url", "image_alt")
+UNIQUE_FIELDS = ("src", "alt", "pages_found_on", "page_count")
+
+
+def _image_rows(page_url, page_title, images):
+    """Yield one CSV row tuple per image, with page fields only on the first row."""
+    if not images:
+        return
+    first, *rest = images
+    yield (page_url, page_title, first["src"], first.get("alt", ""))
+    for img in rest:
+        yield ("", "", img["src"], img.get("alt", ""))
+
+
+def _page_rows(results):
+    """Yield page CSV row tuples for stored results."""
+    for result in results:
+        yield from _image_rows(result["page_url"], result["page_title"],
+                               json_loads(result["images"]))
+
+
+def _unique_rows(image_found_on, image_alt):
+    """Yield one CSV row tuple per unique image, sorted by URL."""
+    for img_url, found_on in sorted(image_found_on.items()):
+        yield (img_url, image_alt[img_url], json_dumps(found_on), len(found_on))
+
+
 def save_results(spider, output_base):
     """Save crawl results to CSV files."""
     page_file = f"{output_base}.csv"
     unique_file = f"{output_base}_unique.csv"
 
-    # Save page-level results with one image per row
+    # Page-level rows were streamed during the crawl; just flush them.
+    # Stored results (Full Monty without openpyxl) are written here instead.
+    spider.close_page_csv()
     if spider.results:
-        fieldnames = ["page_url", "page_title", "image_url", "image_alt"]
-        with open(page_file, "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            for result in spider.results:
-                images = json.loads(result["images"])
-                for i, img in enumerate(images):
-                    writer.writerow({
-                        "page_url": result["page_url"] if i == 0 else "",
-                        "page_title": result["page_title"] if i == 0 else "",
-                        "image_url": img["src"],
-                        "image_alt": img.get("alt", ""),
-                    })
+        with open(page_file, "w", newline="", encoding="utf-8",
+                  buffering=OUTPUT_BUFFER_SIZE) as f:
+            writer = csv.writer(f)
+            writer.writerow(PAGE_FIELDS)
+            writer.writerows(_page_rows(spider.results))
 
     # Save unique images
-    if spider.all_images:
-        with open(unique_file, "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(
-                f, fieldnames=["src", "alt", "pages_found_on", "page_count"]
-            )
-            writer.writeheader()
-            for img_url, img_data in sorted(spider.all_images.items()):
-                writer.writerow({
-                    "src": img_url,
-                    "alt": img_data["alt"],
-                    "pages_found_on": json.dumps(img_data["found_on"]),
-                    "page_count": len(img_data["found_on"]),
-                })
+    if spider.image_found_on:
+        with open(unique_file, "w", newline="", encoding="utf-8",
+                  buffering=OUTPUT_BUFFER_SIZE) as f:
+            writer = csv.writer(f)
+            writer.writerow(UNIQUE_FIELDS)
+            writer.writerows(_unique_rows(spider.image_found_on, spider.image_alt))
+
+    # Optional columnar copy of the unique images
+    parquet_file = None
+    if spider.config.get("parquet") and spider.image_found_on:
+        parquet_file = save_unique_parquet(spider, output_base)
 
     # Print summary
     print("\n" + "=" * 60)
@@ -688,13 +1290,15 @@ def save_results(spider, output_base):
     print(f"Domain:            {spider.config['domain']}")
     print(f"Scrape type:       {spider.config['scrape_type']}")
     print(f"Pages crawled:     {spider.pages_crawled}")
-    print(f"Pages with images: {len(spider.results)}")
-    print(f"Unique images:     {len(spider.all_images)}")
+    print(f"Pages with images: {spider.pages_with_images}")
+    print(f"Unique images:     {len(spider.image_found_on)}")
     print(f"Errors:            {len(spider.errors)}")
     print("-" * 60)
     print(f"Output files:")
     print(f"  Page results:    {page_file}")
     print(f"  Unique images:   {unique_file}")
+    if parquet_file:
+        print(f"  Unique (Parquet): {parquet_file}")
     print("=" * 60)
 
     if spider.errors:
@@ -703,10 +1307,36 @@ def save_results(spider, output_base):
             print(f"  - {error.get('url', 'Unknown')}: {error.get('status', error.get('error_message', 'Unknown'))}")
 
 
+def save_unique_parquet(spider, output_base):
+    """Write unique images to Parquet with found_on as a native list column.
+
+    Returns the file path, or None if pyarrow is not installed.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        print("WARNING: pyarrow not installed, skipping Parquet output. Run: pip install pyarrow")
+        return None
+
+    parquet_file = f"{output_base}_unique.parquet"
+    urls = sorted(spider.image_found_on)
+    found_on = [spider.image_found_on[url] for url in urls]
+    table = pa.table({
+        "src": pa.array(urls, pa.string()),
+        "alt": pa.array([spider.image_alt[url] for url in urls], pa.string()),
+        "pages_found_on": pa.array(found_on, pa.list_(pa.string())),
+        "page_count": pa.array([len(pages) for pages in found_on], pa.int32()),
+    })
+    pq.write_table(table, parquet_file, compression="zstd")
+    return parquet_file
+
+
 def save_results_excel(spider, output_base):
     """Save Full Monty results to an Excel workbook with separate sheets."""
     try:
         from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
         from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
         from openpyxl.utils import get_column_letter
     except ImportError:
@@ -716,7 +1346,8 @@ def save_results_excel(spider, output_base):
         return
 
     xlsx_file = f"{output_base}.xlsx"
-    wb = Workbook()
+    # Write-only mode streams rows out instead of keeping every cell in memory
+    wb = Workbook(write_only=True)
 
     # Styles
     header_font = Font(bold=True, color="FFFFFF", size=11)
@@ -729,10 +1360,15 @@ def save_results_excel(spider, output_base):
         bottom=Side(style="thin"),
     )
 
-    # Separate results by page type
-    category_results = [r for r in spider.results if r.get("page_type") == "category"]
-    product_results = [r for r in spider.results if r.get("page_type") == "product"]
-    other_results = [r for r in spider.results if r.get("page_type") == "other"]
+    # Separate results by page type in one pass
+    results_by_type = {"category": [], "product": [], "other": []}
+    for r in spider.results:
+        bucket = results_by_type.get(r.get("page_type"))
+        if bucket is not None:
+            bucket.append(r)
+    category_results = results_by_type["category"]
+    product_results = results_by_type["product"]
+    other_results = results_by_type["other"]
 
     # Column definitions: (Header, field_key, width)
     category_columns = [
@@ -772,45 +1408,55 @@ def save_results_excel(spider, output_base):
         ("Schema Types", "schema_types", 30),
     ]
 
-    def write_sheet(ws, columns, data, sheet_title):
-        """Write data to a worksheet with formatting."""
-        ws.title = sheet_title
+    def styled_cell(ws, value, font=None, fill=None, alignment=None):
+        """Create a bordered write-only cell with optional styling."""
+        cell = WriteOnlyCell(ws, value=value)
+        cell.border = thin_border
+        if font is not None:
+            cell.font = font
+        if fill is not None:
+            cell.fill = fill
+        if alignment is not None:
+            cell.alignment = alignment
+        return cell
+
+    def write_sheet(columns, data, sheet_title):
+        """Write data to a new worksheet with formatting."""
+        ws = wb.create_sheet(sheet_title)
+
+        # Column widths, frozen header row and auto-filter must be set before rows
+        for col_idx, (_, _, width) in enumerate(columns, 1):
+            ws.column_dimensions[get_column_letter(col_idx)].width = width
+        ws.freeze_panes = "A2"
+        if data:
+            ws.auto_filter.ref = f"A1:{get_column_letter(len(columns))}{len(data) + 1}"
 
         # Write headers
-        for col_idx, (header, _, width) in enumerate(columns, 1):
-            cell = ws.cell(row=1, column=col_idx, value=header)
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = header_alignment
-            cell.border = thin_border
-            ws.column_dimensions[get_column_letter(col_idx)].width = width
+        ws.append([
+            styled_cell(ws, header, header_font, header_fill, header_alignment)
+            for header, _, _ in columns
+        ])
 
         # Write data rows
-        for row_idx, result in enumerate(data, 2):
-            for col_idx, (_, field_key, _) in enumerate(columns, 1):
+        field_keys = [field_key for _, field_key, _ in columns]
+        for result in data:
+            row = []
+            for field_key in field_keys:
                 value = result.get(field_key, "")
                 if isinstance(value, bool):
                     value = "Yes" if value else "No"
-                cell = ws.cell(row=row_idx, column=col_idx, value=value)
-                cell.border = thin_border
-
-        # Freeze header row and add auto-filter
-        ws.freeze_panes = "A2"
-        if data:
-            ws.auto_filter.ref = ws.dimensions
+                row.append(styled_cell(ws, value))
+            ws.append(row)
 
-    # Sheet 1: Categories (use default sheet)
-    ws_categories = wb.active
-    write_sheet(ws_categories, category_columns, category_results, "Categories")
+    # Sheet 1: Categories
+    write_sheet(category_columns, category_results, "Categories")
 
     # Sheet 2: Products
-    ws_products = wb.create_sheet()
-    write_sheet(ws_products, product_columns, product_results, "Products")
+    write_sheet(product_columns, product_results, "Products")
 
     # Sheet 3: Other Pages (if any)
     if other_results:
-        ws_other = wb.create_sheet()
-        write_sheet(ws_other, category_columns, other_results, "Other Pages")
+        write_sheet(category_columns, other_results, "Other Pages")
 
     # Sheet: Summary
     ws_summary = wb.create_sheet("Summary")
@@ -823,25 +1469,31 @@ def save_results_excel(spider, output_base):
         ("Category Pages", len(category_results)),
         ("Product Pages", len(product_results)),
         ("Other Pages", len(other_results)),
-        ("Unique Images", len(spider.all_images)),
+        ("Unique Images", len(spider.image_found_on)),
         ("Errors", len(spider.errors)),
     ]
-    # Header row
-    for col_idx, header in enumerate(["Metric", "Value"], 1):
-        cell = ws_summary.cell(row=1, column=col_idx, value=header)
-        cell.font = summary_header_font
-        cell.fill = summary_header_fill
-        cell.border = thin_border
-    # Data rows
-    for row_idx, (metric, value) in enumerate(summary_data, 2):
-        ws_summary.cell(row=row_idx, column=1, value=metric).font = Font(bold=True)
-        ws_summary.cell(row=row_idx, column=1, value=metric).border = thin_border
-        ws_summary.cell(row=row_idx, column=2, value=value).border = thin_border
     ws_summary.column_dimensions["A"].width = 25
     ws_summary.column_dimensions["B"].width = 40
+    # Header row
+    ws_summary.append([
+        styled_cell(ws_summary, header, summary_header_font, summary_header_fill)
+        for header in ["Metric", "Value"]
+    ])
+    # Data rows
+    metric_font = Font(bold=True)
+    for metric, value in summary_data:
+        ws_summary.append([
+            styled_cell(ws_summary, metric, metric_font),
+            styled_cell(ws_summary, value),
+        ])
 
     wb.save(xlsx_file)
 
+    # Optional columnar copy of the unique images
+    parquet_file = None
+    if spider.config.get("parquet") and spider.image_found_on:
+        parquet_file = save_unique_parquet(spider, output_base)
+
     # Print summary
     print("\n" + "=" * 60)
     print("FULL MONTY SCRAPE COMPLETE")
@@ -851,11 +1503,13 @@ def save_results_excel(spider, output_base):
     print(f"Category pages:    {len(category_results)}")
     print(f"Product pages:     {len(product_results)}")
     print(f"Other pages:       {len(other_results)}")
-    print(f"Unique images:     {len(spider.all_images)}")
+    print(f"Unique images:     {len(spider.image_found_on)}")
     print(f"Errors:            {len(spider.errors)}")
     print("-" * 60)
     print(f"Output file:")
     print(f"  Excel report:    {xlsx_file}")
+    if parquet_file:
+        print(f"  Unique (Parquet): {parquet_file}")
     print("=" * 60)
 
     if spider.errors:
@@ -870,7 +1524,9 @@ def save_results_excel(spider, output_base):
 
 
 def run_scraper(domain, scrape_type, max_pages=0, delay=1.0, concurrent=2,
-                seed_urls=None, known_product_urls=None, known_category_urls=None):
+                seed_urls=None, known_product_urls=None, known_category_urls=None,
+                bloom_dedup=False, autothrottle=False, merge_image_variants=False,
+                parquet=False):
     """
     Run the scraper with given parameters.
 
@@ -883,6 +1539,10 @@ def run_scraper(domain, scrape_type, max_pages=0, delay=1.0, concurrent=2,
         seed_urls: Optional list of additional URLs to use as start pages
         known_product_urls: Optional list of URLs known to be product pages (for classification)
         known_category_urls: Optional list of URLs known to be category pages (for classification)
+        bloom_dedup: Track seen requests in a Bloom filter instead of a set (for very large crawls)
+        autothrottle: Adapt the download delay to server latency instead of a fixed delay
+        merge_image_variants: Count resized/query-string variants of an image as one unique image
+        parquet: Also write the unique images to Parquet (needs pyarrow)
 
     Returns:
         Tuple of (output_base_filename, pages_crawled, unique_images_count)
@@ -904,16 +1564,24 @@ def run_scraper(domain, scrape_type, max_pages=0, delay=1.0, concurrent=2,
         "seed_urls": seed_urls or [],
         "known_product_urls": known_product_urls or [],
         "known_category_urls": known_category_urls or [],
+        "bloom_dedup": bloom_dedup,
+        "autothrottle": autothrottle,
+        "merge_image_variants": merge_image_variants,
+        "parquet": parquet,
     }
 
     output_base = generate_output_path(domain, scrape_type)
+    config["output_base"] = str(output_base)
 
     print("=" * 60)
     print("Website Scraper")
     print("=" * 60)
     print(f"Domain:            {domain}")
     print(f"Scrape type:       {scrape_type} ({SCRAPE_CONFIGS[scrape_type]['description']})")
-    print(f"Download delay:    {delay}s")
+    if autothrottle:
+        print(f"Download delay:    auto (starting at {delay}s)")
+    else:
+        print(f"Download delay:    {delay}s")
     print(f"Concurrent:        {concurrent}")
     if max_pages > 0:
         print(f"Max pages:         {max_pages}")
@@ -923,6 +1591,10 @@ def run_scraper(domain, scrape_type, max_pages=0, delay=1.0, concurrent=2,
         print(f"Known products:    {len(config['known_product_urls'])} product URLs for classification")
     if config["known_category_urls"]:
         print(f"Known categories:  {len(config['known_category_urls'])} category URLs for classification")
+    if bloom_dedup:
+        print(f"Dedup:             Bloom filter")
+    if merge_image_variants:
+        print(f"Image variants:    merged (query and -WxH suffix ignored)")
     print(f"Output folder:     {output_base.parent}")
     print(f"Output prefix:     {output_base.name}")
     print("=" * 60 + "\n")
@@ -962,6 +1634,7 @@ Examples:
   python scraper.py --url "www.example.com" --type category
   python scraper.py --url "www.example.com" --type product --max-pages 100
   python scraper.py --url "www.example.com" --type all --delay 0.5
+  python scraper.py --url "www.example.com" --type fullmonty --preset fast
   python scraper.py --url "www.example.com" --type fullmonty
 
 Scrape types:
@@ -990,17 +1663,24 @@ Scrape types:
         default=0,
         help="Maximum pages to crawl (0 = unlimited)"
     )
+    parser.add_argument(
+        "--preset", "-p",
+        choices=list(CRAWL_PRESETS.keys()),
+        default="polite",
+        help="Request pacing preset: polite (1s delay, 2 concurrent) or fast "
+             "(autothrottled from 0.25s, 8 concurrent) (default: polite)"
+    )
     parser.add_argument(
         "--delay", "-d",
         type=float,
-        default=1.0,
-        help="Delay between requests in seconds (default: 1.0)"
+        default=None,
+        help="Delay between requests in seconds (default: from --preset)"
     )
     parser.add_argument(
         "--concurrent", "-c",
         type=int,
-        default=2,
-        help="Number of concurrent requests (default: 2)"
+        default=None,
+        help="Number of concurrent requests (default: from --preset)"
     )
     parser.add_argument(
         "--urls",
@@ -1020,9 +1700,35 @@ Scrape types:
         default=None,
         help="Path to a text file containing known category URLs (one per line) for page classification"
     )
+    parser.add_argument(
+        "--bloom-dedup",
+        action="store_true",
+        help="Track seen URLs in a Bloom filter instead of an exact set (lower memory on very large crawls)"
+    )
+    parser.add_argument(
+        "--autothrottle",
+        action="store_true",
+        help="Adapt the delay to server response times, targeting --concurrent requests in flight"
+    )
+    parser.add_argument(
+        "--merge-image-variants",
+        action="store_true",
+        help="Treat resized variants (-300x200, ?w=...) of an image as one unique image"
+    )
+    parser.add_argument(
+        "--parquet",
+        action="store_true",
+        help="Also write unique images to {prefix}_unique.parquet (requires pyarrow)"
+    )
 
     args = parser.parse_args()
 
+    # Explicit pacing flags win over the preset
+    preset = CRAWL_PRESETS[args.preset]
+    delay = args.delay if args.delay is not None else preset["delay"]
+    concurrent = args.concurrent if args.concurrent is not None else preset["concurrent"]
+    autothrottle = args.autothrottle or preset["autothrottle"]
+
     # Clean up URL (remove protocol if provided)
     domain = args.url.replace("https://", "").replace("http://", "").rstrip("/")
 
@@ -1060,11 +1766,15 @@ Scrape types:
         domain=domain,
         scrape_type=args.type,
         max_pages=args.max_pages,
-        delay=args.delay,
-        concurrent=args.concurrent,
+        delay=delay,
+        concurrent=concurrent,
         seed_urls=seed_urls,
         known_product_urls=known_product_urls,
         known_category_urls=known_category_urls,
+        bloom_dedup=args.bloom_dedup,
+        autothrottle=autothrottle,
+        merge_image_variants=args.merge_image_variants,
+        parquet=args.parquet,
     )
 
 
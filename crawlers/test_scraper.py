@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""Tests for scraper.py: parse-level checks plus a local --bloom-dedup crawl.
+
+Runs under pytest or directly (python test_scraper.py). The crawl test starts
+Twisted's reactor, which can't be restarted, so it runs last.
+"""
+import http.server
+import tempfile
+import threading
+from collections import Counter
+from pathlib import Path
+from types import SimpleNamespace
+from urllib.parse import urljoin, urlsplit
+
+from scrapy import signals
+from scrapy.crawler import CrawlerProcess
+from scrapy.http import HtmlResponse, Request
+
+from scraper import (
+    RATE_LIMIT_RECOVERY_PAGES,
+    BloomDupeFilter,
+    BloomFilter,
+    ScraperSpider,
+    _is_denied,
+    _url_joiner,
+)
+
+PAGES = {
+    "/": ["/p1", "/p2", "/p1#top"],
+    "/p1": ["/", "/p2", "/p3"],
+    "/p2": ["/p1", "/p3", "/p3"],
+    "/p3": ["/", "/p1", "/p2"],
+}
+
+
+def make_response(url, body):
+    return HtmlResponse(url=url, body=body.encode(), encoding="utf-8", request=Request(url))
+
+
+def test_merged_variants_list_page_once():
+    config = {
+        "domain": "www.example.com",
+        "scrape_type": "all",
+        "merge_image_variants": True,
+        "output_base": str(Path(tempfile.mkdtemp()) / "variants"),
+    }
+    spider = ScraperSpider(config=config)
+    body = (
+        '<html><body>'
+        '<img src="/img/shoe.jpg" alt="Shoe">'
+        '<img src="/img/shoe-300x200.jpg">'
+        '<img src="/img/shoe.jpg?w=800">'
+        '</body></html>'
+    )
+    list(spider.parse(make_response("https://www.example.com/p1", body)))
+    list(spider.parse(make_response("https://www.example.com/p2", body)))
+    spider.close_page_csv()
+
+    assert spider.image_found_on == {
+        "https://www.example.com/img/shoe.jpg": [
+            "https://www.example.com/p1",
+            "https://www.example.com/p2",
+        ],
+    }
+
+
+def test_link_counts_match_urljoin():
+    hrefs = [" https://facebook.com/x", "/rel", "rel/x", "?q=1", "//cdn.other.com/z", "mailto:a@b",
+             " tel:123", "https:foo", "http:foo", "ftp://example.com/", "#top", "javascript:void(0)"]
+    body = "<html><body>" + "".join(f'<a href="{h}">x</a>' for h in hrefs) + "</body></html>"
+    for page_url in ("https://www.example.com/a/b", "https://cdn.other.com/a", "http://mirror.org/x"):
+        spider = ScraperSpider(config={"domain": "www.example.com", "scrape_type": "fullmonty"})
+        response = make_response(page_url, body)
+        root = response.selector.root
+        metrics = spider._extract_content_metrics(response, root, [], root.xpath("//a/@href"))
+
+        # Reference: the urljoin + urlparse classification the counts must agree with
+        counted = [h for h in hrefs if not h.startswith(("#", "javascript:"))]
+        netlocs = [urlsplit(urljoin(page_url, h)).netloc for h in counted]
+        external = sum(1 for n in netlocs if n and "www.example.com" not in n)
+        assert metrics["external_link_count"] == external, page_url
+        assert metrics["internal_link_count"] == len(counted) - external, page_url
+
+
+def test_deny_checks_path_and_query():
+    denied = [
+        "https://www.example.com/cart/",
+        "https://www.example.com/en/account/orders",
+        "https://www.example.com/login?next=/account/",
+        "https://www.example.com/shop/?add-to-cart=12",
+        "https://www.example.com/shop/?ref=x?remove_item=3",
+    ]
+    allowed = [
+        "https://www.example.com/cart",
+        "https://www.example.com/shop/cart-covers/",
+        "https://www.example.com/search?q=cart",
+        "https://www.example.com/shop/?x=1&add-to-cart=12",
+    ]
+    assert all(_is_denied(url) for url in denied)
+    assert not any(_is_denied(url) for url in allowed)
+
+
+def test_url_joiner_matches_urljoin():
+    base = "https://www.example.com/shop/item"
+    join = _url_joiner(base)
+    srcs = ["/img/a.jpg", "//cdn.example.com/a.jpg", "https://cdn.example.com/b.png?w=300",
+            "http://other.com/c.gif#f", "img/rel.jpg", "../up.jpg", "/a/./b.jpg", "/a.jpg;",
+            "/a.jpg;?w=1", "/a.jpg?", "/a.jpg?#f", "//", "///x.jpg", "https:///x.jpg", " /space.jpg"]
+    for src in srcs:
+        assert join(src) == urljoin(base, src), src
+
+
+def make_backoff_spider(autothrottle):
+    spider = ScraperSpider(config={"domain": "www.example.com", "scrape_type": "all",
+                                   "autothrottle": autothrottle})
+    slot = SimpleNamespace(delay=0.5)
+    spider.crawler = SimpleNamespace(engine=SimpleNamespace(downloader=SimpleNamespace(slots={"host": slot})))
+    request = Request("https://www.example.com/", meta={"download_slot": "host"})
+    return spider, slot, HtmlResponse(url=request.url, request=request)
+
+
+def test_rate_limit_backoff_recovers_to_original_delay():
+    spider, slot, response = make_backoff_spider(autothrottle=False)
+    spider._back_off(response)
+    spider._back_off(response)
+    assert slot.delay == 2.0 and spider.rate_limited
+
+    for _ in range(RATE_LIMIT_RECOVERY_PAGES * 3):
+        spider._recover(response)
+    assert slot.delay == 0.5
+    assert not spider.rate_limited
+
+
+def test_rate_limit_backoff_leaves_autothrottle_alone():
+    spider, slot, response = make_backoff_spider(autothrottle=True)
+    spider._back_off(response)
+    assert slot.delay == 0.5
+    assert not spider.rate_limited
+
+
+def test_bloom_filter_membership():
+    bloom = BloomFilter(capacity=10_000, error_rate=0.01)
+    items = [f"https://www.example.com/p/{i}" for i in range(10_000)]
+    bloom.update(items)
+    assert all(item in bloom for item in items)
+    assert all(item.encode() in bloom for item in items[:100])  # str and bytes hash alike
+    unseen = sum(f"https://www.example.com/q/{i}" in bloom for i in range(10_000))
+    assert unseen < 300  # ~1% false positives expected
+
+
+def test_bloom_dupefilter_request_seen_and_jobdir():
+    job_dir = tempfile.mkdtemp()
+    dupefilter = BloomDupeFilter(job_dir)
+    first = Request("https://www.example.com/a")
+    assert not dupefilter.request_seen(first)
+    assert dupefilter.request_seen(Request("https://www.example.com/a"))
+    assert not dupefilter.request_seen(Request("https://www.example.com/b"))
+    assert not dupefilter._fingerprints  # Nothing kept in Scrapy's exact set
+    dupefilter.close("finished")
+
+    # Fingerprints written to requests.seen are restored into the new filter
+    resumed = BloomDupeFilter(job_dir)
+    assert resumed.request_seen(first)
+    assert not resumed._fingerprints
+    resumed.close("finished")
+
+
+class RecordingBloomDupeFilter(BloomDupeFilter):
+    """BloomDupeFilter that remembers its instances and the requests it checked."""
+
+    instances = []
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checked = []
+        self.instances.append(self)
+
+    def request_seen(self, request):
+        self.checked.append(request.url)
+        return super().request_seen(request)
+
+
+class SiteHandler(http.server.BaseHTTPRequestHandler):
+    hits = Counter()
+
+    def do_GET(self):
+        links = PAGES.get(self.path)
+        if links is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        self.hits[self.path] += 1
+        body = "".join(f'<a href="{href}">link</a>' for href in links)
+        body = f'<html><body><img src="/img{self.path.strip("/")}.jpg" alt="x">{body}</body></html>'
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def log_message(self, *args):
+        pass
+
+
+class LocalSpider(ScraperSpider):
+    """ScraperSpider started from a plain-HTTP local URL instead of https://domain/."""
+
+    def __init__(self, config, *args, **kwargs):
+        super().__init__(config, *args, **kwargs)
+        self.start_urls = [config["start_url"]]
+
+
+def test_bloom_dedup_crawl():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), SiteHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        crawler = run_local_crawl(server.server_port)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    spider = crawler.spider
+    assert spider.errors == []
+    assert set(SiteHandler.hits) == set(PAGES)
+    # Start requests bypass the dupefilter, so "/" is fetched once more when linked
+    linked = {path: count for path, count in SiteHandler.hits.items() if path != "/"}
+    assert all(count == 1 for count in linked.values()), SiteHandler.hits
+    assert spider.pages_crawled == sum(SiteHandler.hits.values())
+    # Repeated links are dropped by the spider's Bloom filter before Scrapy sees them...
+    base = f"http://127.0.0.1:{server.server_port}"
+    assert isinstance(spider.queued_urls, BloomFilter)
+    assert all(base + path in spider.queued_urls for path in PAGES if path != "/")
+    # ...and every followed request went through the Bloom dupefilter, not Scrapy's set
+    (dupefilter,) = RecordingBloomDupeFilter.instances
+    assert sorted(dupefilter.checked) == sorted(base + path for path in PAGES)
+    assert all(dupefilter.request_seen(Request(url)) for url in set(dupefilter.checked))
+    assert not dupefilter._fingerprints
+
+
+def run_local_crawl(port):
+    out_dir = tempfile.mkdtemp()
+
+    config = {
+        "domain": "127.0.0.1",
+        "scrape_type": "all",
+        "max_pages": 0,
+        "delay": 0,
+        "concurrent": 2,
+        "log_level": "ERROR",
+        "bloom_dedup": True,
+        "start_url": f"http://127.0.0.1:{port}/",
+        "output_base": str(Path(out_dir) / "local-all"),
+    }
+    settings = ScraperSpider.create_settings(config)
+    assert settings["DUPEFILTER_CLASS"] is BloomDupeFilter
+    settings["DUPEFILTER_CLASS"] = RecordingBloomDupeFilter
+    process = CrawlerProcess(settings=settings)
+    crawler = process.create_crawler(LocalSpider)
+    crawler.signals.connect(lambda spider: spider.close_page_csv(), signal=signals.spider_closed)
+    process.crawl(crawler, config=config)
+    process.start()
+    return crawler
+
+
+if __name__ == "__main__":
+    test_merged_variants_list_page_once()
+    test_link_counts_match_urljoin()
+    test_deny_checks_path_and_query()
+    test_url_joiner_matches_urljoin()
+    test_bloom_filter_membership()
+    test_bloom_dupefilter_request_seen_and_jobdir()
+    test_rate_limit_backoff_recovers_to_original_delay()
+    test_rate_limit_backoff_leaves_autothrottle_alone()
+    test_bloom_dedup_crawl()
+    print("OK")